@@ -5,6 +5,16 @@
 #              are available and how they're implemented.
 #              Don't modify the contents of this file.
 
+import pickle
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, without it keys are always hashed one at a time
+    np = None
+
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
@@ -78,6 +88,16 @@ class DynamicArray:
         return len(self._data)
 
 
+def batch_to_list(batch) -> list:
+    """
+    Return the items of a DynamicArray, or of any other iterable, as a list.
+    Used by the bulk (batch) methods of both hash maps.
+    """
+    if isinstance(batch, DynamicArray):
+        return [batch.get_at_index(index) for index in range(batch.length())]
+    return list(batch)
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -96,6 +116,324 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+# Keys are hashed in chunks so the fixed-width array of a batch stays small
+# even when a few keys are very long
+HASH_BATCH_CHUNK = 4096
+
+# Batches shorter than this are hashed one key at a time, since building
+# the NumPy arrays costs more than it saves
+HASH_BATCH_MIN = 64
+
+
+def _code_points(keys) -> "np.ndarray":
+    """
+    Return a 2D NumPy array with one row per key holding its code points,
+    padded on the right with zeros to the length of the longest key.
+    Accepts a sequence of str, a fixed-width Unicode array, or an encoded
+    (bytes) array, in which case each byte is used as the code point.
+    """
+    array = np.asarray(keys)
+    if array.dtype.kind not in 'US':
+        array = array.astype(np.str_)
+
+    # a row of zeros for every key when there are no keys or all are empty
+    if array.dtype.itemsize == 0 or array.size == 0:
+        return np.zeros((array.shape[0], 0), dtype=np.int64)
+
+    unit = np.uint32 if array.dtype.kind == 'U' else np.uint8
+    return array.view(unit).reshape(array.shape[0], -1).astype(np.int64)
+
+
+def hash_function_1_batch(keys) -> "np.ndarray":
+    """
+    Batch version of hash_function_1, returns the sum of the code points
+    of every key as an int64 NumPy array.  Requires NumPy.
+    """
+    return _code_points(keys).sum(axis=1)
+
+
+def hash_function_2_batch(keys) -> "np.ndarray":
+    """
+    Batch version of hash_function_2, returns the position-weighted sum
+    of the code points of every key as an int64 NumPy array.  Requires NumPy.
+    """
+    codes = _code_points(keys)
+    weights = np.arange(1, codes.shape[1] + 1, dtype=np.int64)
+    return codes @ weights
+
+
+# Batch (vectorized) versions of the scalar hash functions
+BATCH_HASH_FUNCTIONS = {
+    hash_function_1: hash_function_1_batch,
+    hash_function_2: hash_function_2_batch,
+}
+
+
+def hash_keys(function, keys: list) -> list:
+    """
+    Return a list with the hash of every key in the given list.  When NumPy
+    is available and the hash function has a batch version, the keys are
+    hashed in vectorized chunks, otherwise they are hashed one at a time.
+    """
+    batch_function = BATCH_HASH_FUNCTIONS.get(function)
+    if np is None or batch_function is None or len(keys) < HASH_BATCH_MIN:
+        return [function(key) for key in keys]
+
+    hashes = []
+    for start in range(0, len(keys), HASH_BATCH_CHUNK):
+        hashes.extend(batch_function(keys[start:start + HASH_BATCH_CHUNK]).tolist())
+    return hashes
+
+
+# ------- Hash function registry, usable by both HashMaps ------- #
+
+# All of the hashes below are 64 bit (non-negative and below 2 ** 64)
+MASK_64 = (1 << 64) - 1
+
+# 64 bit FNV-1a parameters
+FNV_OFFSET_BASIS = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+
+def fnv1a_hash(key: str) -> int:
+    """
+    64 bit FNV-1a hash of the UTF-8 bytes of the key.  Every byte
+    changes every later step, so anagrams hash differently.
+    """
+    hash = FNV_OFFSET_BASIS
+    for byte in key.encode():
+        hash = ((hash ^ byte) * FNV_PRIME) & MASK_64
+    return hash
+
+
+def _rotate_left(value: int, bits: int) -> int:
+    """Rotate a 64 bit integer left by the given number of bits."""
+    return ((value << bits) | (value >> (64 - bits))) & MASK_64
+
+
+class SipHash:
+    """
+    SipHash-2-4 of the UTF-8 bytes of a key, keyed with a 128 bit seed.
+    Keys chosen to collide under one seed do not collide under another, and
+    the same seed always gives the same hashes, in any process.  Instances
+    with the same seed are equal, so a map using one can be pickled.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        """Initialize the hash function with the given 128 bit seed."""
+        self.seed = seed & ((1 << 128) - 1)
+        self._k0 = self.seed & MASK_64
+        self._k1 = self.seed >> 64
+
+    def __eq__(self, other: object) -> bool:
+        """Hash functions with the same seed are equal."""
+        return isinstance(other, SipHash) and other.seed == self.seed
+
+    def __hash__(self) -> int:
+        """Hash of the seed, so equal hash functions hash the same."""
+        return hash((SipHash, self.seed))
+
+    def __repr__(self) -> str:
+        """Return the hash function with its seed."""
+        return f"SipHash({self.seed:#x})"
+
+    def __call__(self, key: str) -> int:
+        """Return the hash of the key."""
+        data = key.encode()
+        v0 = self._k0 ^ 0x736f6d6570736575
+        v1 = self._k1 ^ 0x646f72616e646f6d
+        v2 = self._k0 ^ 0x6c7967656e657261
+        v3 = self._k1 ^ 0x7465646279746573
+
+        def rounds(count: int) -> None:
+            nonlocal v0, v1, v2, v3
+            for _ in range(count):
+                v0 = (v0 + v1) & MASK_64
+                v1 = _rotate_left(v1, 13) ^ v0
+                v0 = _rotate_left(v0, 32)
+                v2 = (v2 + v3) & MASK_64
+                v3 = _rotate_left(v3, 16) ^ v2
+                v0 = (v0 + v3) & MASK_64
+                v3 = _rotate_left(v3, 21) ^ v0
+                v2 = (v2 + v1) & MASK_64
+                v1 = _rotate_left(v1, 17) ^ v2
+                v2 = _rotate_left(v2, 32)
+
+        # whole 8 byte words, then the last bytes with the length in the top byte
+        end = len(data) - len(data) % 8
+        for start in range(0, end, 8):
+            word = int.from_bytes(data[start:start + 8], 'little')
+            v3 ^= word
+            rounds(2)
+            v0 ^= word
+        word = int.from_bytes(data[end:], 'little') | ((len(data) & 0xff) << 56)
+        v3 ^= word
+        rounds(2)
+        v0 ^= word
+
+        v2 ^= 0xff
+        rounds(4)
+        return v0 ^ v1 ^ v2 ^ v3
+
+
+# SipHash with a fixed seed, so its hashes are the same in every process
+siphash_hash = SipHash(0x0706050403020100_0f0e0d0c0b0a0908)
+
+
+def builtin_hash(key: str) -> int:
+    """
+    Python's built-in hash() of the key, made non-negative.  By far the
+    fastest, but string hashes change from one process to the next unless
+    PYTHONHASHSEED is set, so it must not be used by a map that is shared
+    with or saved for another process.
+    """
+    return hash(key) & MASK_64
+
+
+# Hash functions by name, see register_hash_function() and hash_quality()
+HASH_REGISTRY = {
+    'sum': hash_function_1,
+    'weighted': hash_function_2,
+    'fnv1a': fnv1a_hash,
+    'siphash': siphash_hash,
+    'builtin': builtin_hash,
+}
+
+
+def register_hash_function(name: str, function) -> None:
+    """
+    Add a hash function to HASH_REGISTRY under the given name.
+    """
+    if name in HASH_REGISTRY:
+        raise ValueError(f"a hash function is already registered as {name!r}")
+    HASH_REGISTRY[name] = function
+
+
+def get_hash_function(name: str):
+    """
+    Return the hash function registered under the given name.
+    """
+    if name not in HASH_REGISTRY:
+        raise ValueError(f"no hash function is registered as {name!r}, use one of {list(HASH_REGISTRY)}")
+    return HASH_REGISTRY[name]
+
+
+def hash_quality(table, keys: list) -> dict:
+    """
+    Collision quality report of a hash function on a sample of keys.  Puts
+    every key into the given empty hash map (SC or OA, built with the hash
+    function to report on), and returns its stats() with:
+
+    function            name of the hash function in HASH_REGISTRY, if it has one
+    keys                number of distinct keys in the sample
+    distinct_hashes     number of different full hashes of those keys
+    bucket_variance     variance of the number of keys per home bucket
+    expected_variance   the same, for a perfectly random hash function
+    max_bucket          most keys sharing one home bucket
+    """
+    keys = list(dict.fromkeys(keys))
+    table.put_many((key, None) for key in keys)
+    table._finish_resize()
+
+    capacity = table.get_capacity()
+    hashes = hash_keys(table._hash_function, keys)
+    buckets = [0] * capacity
+    for hash in hashes:
+        buckets[hash % capacity] += 1
+
+    mean = len(keys) / capacity
+    names = [name for name, function in HASH_REGISTRY.items() if function == table._hash_function]
+    report = {
+        'function': names[0] if names else None,
+        'keys': len(keys),
+        'distinct_hashes': len(set(hashes)),
+        'bucket_variance': sum((count - mean) ** 2 for count in buckets) / capacity,
+        'expected_variance': mean * (1 - 1 / capacity),
+        'max_bucket': max(buckets),
+    }
+    report.update(table.stats())
+    return report
+
+
+# Header of a file written by save_pickle(): magic, length of the pickle
+# stream and number of out-of-band buffers, followed by the buffer lengths
+PICKLE_MAGIC = b'CS261PK5'
+PICKLE_HEADER = struct.Struct('<8sQQ')
+
+
+def flat_hashes(hashes: list):
+    """
+    Return the given hashes as an array('Q') of 8 byte hashes, or as the
+    list itself if one of them does not fit in 64 bits.  Used by both hash
+    maps to save their cached hashes.
+    """
+    try:
+        return array('Q', hashes)
+    except OverflowError:
+        return hashes
+
+
+def flat_buffer(values, protocol: int):
+    """
+    Return an array to be pickled as part of a hash map's flat layout.  With
+    pickle protocol 5 it is wrapped in a PickleBuffer, so it can be written
+    out-of-band instead of being copied into the pickle stream.
+    """
+    if protocol >= 5 and isinstance(values, array):
+        return pickle.PickleBuffer(values)
+    return values
+
+
+def unflat_array(typecode: str, values):
+    """
+    Return what was given to flat_buffer(), after it went through pickle,
+    as an array of the given type (or as the list it was).
+    """
+    if isinstance(values, (array, list)):
+        return values
+    restored = array(typecode)
+    restored.frombytes(memoryview(values).cast('B'))
+    return restored
+
+
+def save_pickle(obj, path: str) -> None:
+    """
+    Write an object to a file with pickle protocol 5, writing each of its
+    out-of-band buffers raw after the pickle stream.
+    """
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    with open(path, 'wb') as output:
+        output.write(PICKLE_HEADER.pack(PICKLE_MAGIC, len(data), len(buffers)))
+        output.write(array('Q', [buffer.raw().nbytes for buffer in buffers]).tobytes())
+        output.write(data)
+        for buffer in buffers:
+            output.write(buffer.raw())
+
+
+def load_pickle(path: str) -> object:
+    """
+    Read an object written by save_pickle(), reading each out-of-band
+    buffer with a single read.  Like pickle itself, this must only be
+    used on trusted files.
+    """
+    with open(path, 'rb') as source:
+        magic, data_length, count = PICKLE_HEADER.unpack(source.read(PICKLE_HEADER.size))
+        if magic != PICKLE_MAGIC:
+            raise ValueError(f"{path} was not written by save_pickle()")
+
+        lengths = array('Q')
+        lengths.frombytes(source.read(8 * count))
+        data = source.read(data_length)
+        buffers = []
+        for length in lengths:
+            buffer = bytearray(length)
+            source.readinto(buffer)
+            buffers.append(buffer)
+
+    return pickle.loads(data, buffers=buffers)
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,11 +441,17 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    def __init__(self, key: str, value: object, next: "SLNode" = None,
+                 hash: int = None) -> None:
+        """
+        Initialize node given a key and value.
+        The full (unreduced) hash of the key may be cached in the node
+        so the hash map never has to run the hash function again.
+        """
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -168,35 +512,46 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, caching the key's hash."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If the key's hash is given, it is compared before the key itself.
         Return True if removal was successful, False otherwise.
         """
+        return self.pop(key, hash) is not None
+
+    def pop(self, key: str, hash: int = None) -> SLNode:
+        """
+        Remove first node with matching key and return it, or None if no match.
+        If the key's hash is given, it is compared before the key itself.
+        """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
                     self._head = node.next
                 self._size -= 1
-                return True
+                return node
 
             previous, node = node, node.next
-        return False
+        return None
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If the key's hash is given, it is compared before the key itself.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -210,14 +565,23 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Initialize an entry for use in a hash map.
+        The full (unreduced) hash of the key may be cached in the entry
+        so the hash map never has to run the hash function again.
+        """
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
 
+        # Number of quadratic probe steps from the key's home bucket
+        # to the bucket the entry is stored in
+        self.distance = 0
+
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
@@ -0,0 +1,981 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Benchmarks for the separate chaining (SC) and open addressing (OA)
+# hash maps.  Run with: python hash_map_benchmark.py <benchmark> [options]
+
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import hash_map_oa
+import hash_map_oa_compact
+import hash_map_oa_file
+import hash_map_oa_shared
+import hash_map_oa_ttl
+import hash_map_sc
+import hash_map_sc_concurrent
+import hash_map_sc_parallel
+import hash_map_sc_pool
+from a6_include import DynamicArray, HASH_REGISTRY, hash_function_1, hash_function_2, hash_keys, hash_quality, np
+
+MAPS = {'sc': hash_map_sc.HashMap, 'oa': hash_map_oa.HashMap}
+
+# Alternative storage layouts, compared by the memory benchmark
+LAYOUTS = {'sc': hash_map_sc.HashMap, 'sc-pool': hash_map_sc_pool.HashMap,
+           'oa': hash_map_oa.HashMap, 'oa-compact': hash_map_oa_compact.HashMap}
+# The two sample hash functions, then the rest of the registry in a6_include
+HASH_FUNCTIONS = {'1': hash_function_1, '2': hash_function_2,
+                  **{name: function for name, function in HASH_REGISTRY.items()
+                     if function not in (hash_function_1, hash_function_2)}}
+
+# Resize policies compared by the policy benchmark, (max_load, growth_factor)
+POLICIES = {'sc': [(0.5, 1.5), (0.5, 2), (0.5, 4), (1.0, 1.5), (1.0, 2), (1.0, 4), (2.0, 2)],
+            'oa': [(0.3, 2), (0.5, 1.5), (0.5, 2), (0.5, 4), (0.75, 1.5), (0.75, 2)]}
+
+# Key distributions and workloads run by the suite
+DISTRIBUTIONS = ('uniform', 'zipf', 'anagram', 'long')
+WORKLOADS = ('put', 'get-hit', 'get-miss', 'remove', 'mixed', 'find_mode')
+
+
+def make_keys(n: int, length: int = 32, seed: int = 0) -> list:
+    """
+    Returns a list of n unique random string keys of the given length.
+    The same seed always produces the same keys.
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits
+    keys = set()
+    while len(keys) < n:
+        keys.add(''.join(rng.choices(alphabet, k=length)))
+    return sorted(keys)
+
+
+def bench_resize(args) -> None:
+    """
+    Times a single resize_table() call that doubles a map holding n keys.
+    Resizing reuses the cached hashes, so the time spent running the hash
+    function over every key is reported as the cost a rehashing resize
+    would add on top ("before").
+    """
+    keys = make_keys(args.n, args.key_length)
+    function = HASH_FUNCTIONS[args.function]
+
+    # the time it takes to run the hash function over every key once
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    rehash_time = time.perf_counter() - start
+
+    print(f"{'map':<4}{'n':>10}{'rehash (before)':>18}{'cached (after)':>18}")
+    for name in args.maps:
+        m = MAPS[name](args.n, function)
+        for key in keys:
+            m.put(key, key)
+
+        start = time.perf_counter()
+        m.resize_table(m.get_capacity() * 2)
+        resize_time = time.perf_counter() - start
+
+        print(f"{name:<4}{args.n:>10}{resize_time + rehash_time:>17.3f}s{resize_time:>17.3f}s")
+
+
+def bench_bulk(args) -> None:
+    """
+    Times loading n keys into an empty map with a put() loop against a
+    single put_many() call, then looking them all up with get_many().
+    """
+    keys = make_keys(args.n, args.key_length)
+    pairs = [(key, index) for index, key in enumerate(keys)]
+    function = HASH_FUNCTIONS[args.function]
+
+    print(f"{'map':<4}{'n':>10}{'put loop':>12}{'put_many':>12}{'speedup':>10}{'get loop':>12}{'get_many':>12}")
+    for name in args.maps:
+        m = MAPS[name](11, function)
+        start = time.perf_counter()
+        for key, value in pairs:
+            m.put(key, value)
+        put_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        get_time = time.perf_counter() - start
+
+        m = MAPS[name](11, function)
+        start = time.perf_counter()
+        m.put_many(pairs)
+        put_many_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m.get_many(keys)
+        get_many_time = time.perf_counter() - start
+
+        print(f"{name:<4}{args.n:>10}{put_time:>11.3f}s{put_many_time:>11.3f}s{put_time / put_many_time:>9.2f}x"
+              f"{get_time:>11.3f}s{get_many_time:>11.3f}s")
+
+
+def bench_hash(args) -> None:
+    """
+    Times hashing n keys one at a time against hash_keys(), which hashes
+    them in vectorized chunks when NumPy is installed.
+    """
+    keys = make_keys(args.n, args.key_length)
+
+    print(f"NumPy installed: {np is not None}")
+    print(f"{'function':<18}{'n':>10}{'scalar':>12}{'hash_keys':>12}{'speedup':>10}")
+    for name, function in HASH_FUNCTIONS.items():
+        start = time.perf_counter()
+        for key in keys:
+            function(key)
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hash_keys(function, keys)
+        batch_time = time.perf_counter() - start
+
+        label = 'hash_function_' + name if name.isdigit() else name
+        print(f"{label:<18}{args.n:>10}{scalar_time:>11.3f}s{batch_time:>11.3f}s"
+              f"{scalar_time / batch_time:>9.2f}x")
+
+
+def percentile(values: list, fraction: float) -> int:
+    """
+    Returns the value at the given fraction (0.0 - 1.0) of the sorted values.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def bench_probe(args) -> None:
+    """
+    Fills an open addressing map of capacity n to several load factors,
+    bypassing its automatic resize, and reports the probe lengths of
+    successful and unsuccessful lookups for each probing mode.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(2 * args.n, args.key_length)
+    present, missing = keys[:args.n], keys[args.n:]
+
+    print(f"{'mode':<12}{'load':>6}{'hit mean':>10}{'hit p99':>9}{'hit max':>9}"
+          f"{'miss mean':>11}{'miss p99':>10}{'miss max':>10}")
+    for load in (0.5, 0.6, 0.7, 0.8, 0.9):
+        for mode in hash_map_oa.PROBING_MODES:
+            m = hash_map_oa.HashMap(args.n, function, probing=mode)
+            inserted = []
+            for key in present:
+                if m.get_size() >= load * m.get_capacity():
+                    break
+                m._insert_hashed(key, None, function(key))
+                inserted.append(key)
+
+            hits = [m._probe_length(key, function(key)) for key in inserted]
+            misses = [m._probe_length(key, function(key)) for key in missing[:len(inserted)]]
+            print(f"{mode:<12}{m.table_load():>6.2f}{sum(hits) / len(hits):>10.2f}{percentile(hits, 0.99):>9}"
+                  f"{max(hits):>9}{sum(misses) / len(misses):>11.2f}{percentile(misses, 0.99):>10}{max(misses):>10}")
+
+
+def bench_churn(args) -> None:
+    """
+    Keeps n keys in an open addressing map while repeatedly removing the
+    oldest key and adding a new one, with and without tombstone rebuilds,
+    and reports the time of n lookups after each round of churn.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(6 * args.n, args.key_length)
+
+    print(f"{'tombstone_limit':<16}{'round':>6}{'tombstones':>12}{'lookups':>10}")
+    for limit in (None, 0.25):
+        m = hash_map_oa.HashMap(11, function, tombstone_limit=limit)
+        m.put_many((key, None) for key in keys[:args.n])
+        for churn_round in range(1, 6):
+            live = keys[churn_round * args.n:(churn_round + 1) * args.n]
+            for old_key, new_key in zip(keys[(churn_round - 1) * args.n:], live):
+                m.remove(old_key)
+                m.put(new_key, None)
+
+            start = time.perf_counter()
+            for key in live:
+                m.get(key)
+            lookup_time = time.perf_counter() - start
+            print(f"{str(limit):<16}{churn_round:>6}{m.get_tombstones():>12}{lookup_time:>9.3f}s")
+
+
+def bench_latency(args) -> None:
+    """
+    Times every single put() while loading n keys into a small map, with
+    stop-the-world and incremental resizing.  The garbage collector is
+    paused while timing so its pauses do not hide resize pauses.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+
+    print(f"{'map':<4}{'incremental':<13}{'n':>10}{'total':>10}{'p99.9 put':>12}{'max put':>12}")
+    for name in args.maps:
+        for incremental in (False, True):
+            m = MAPS[name](11, function, incremental=incremental)
+            latencies = []
+            gc.collect()
+            gc.disable()
+            for key in keys:
+                start = time.perf_counter()
+                m.put(key, None)
+                latencies.append(time.perf_counter() - start)
+            gc.enable()
+
+            print(f"{name:<4}{str(incremental):<13}{args.n:>10}{sum(latencies):>9.3f}s"
+                  f"{percentile(latencies, 0.999) * 1000:>10.3f}ms{max(latencies) * 1000:>10.3f}ms")
+
+
+def bench_memory(args) -> None:
+    """
+    Loads n keys into each storage layout with put() and reports the memory
+    the map holds (measured with tracemalloc in a separate load, keys
+    excluded), the load time and the time to look every key up.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+
+    print(f"{'layout':<12}{'n':>10}{'memory':>12}{'bytes/key':>11}{'put':>10}{'get':>10}")
+    for name, layout in LAYOUTS.items():
+        start = time.perf_counter()
+        m = layout(11, function)
+        for index, key in enumerate(keys):
+            m.put(key, index)
+        put_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            m.get(key)
+        get_time = time.perf_counter() - start
+
+        # tracing slows every allocation down, so memory is measured separately
+        m = None
+        gc.collect()
+        tracemalloc.start()
+        m = layout(11, function)
+        for index, key in enumerate(keys):
+            m.put(key, index)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print(f"{name:<12}{args.n:>10}{memory / 2 ** 20:>10.1f}MB{memory / args.n:>11.1f}"
+              f"{put_time:>9.3f}s{get_time:>9.3f}s")
+
+
+def bench_policy(args) -> None:
+    """
+    Loads n keys into each map under every resize policy (max load factor
+    and growth factor) and reports the put and get throughput, the number
+    of resizes, the final capacity and the memory the map holds.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+
+    print(f"{'map':<4}{'max_load':>9}{'growth':>8}{'put ops/s':>12}{'get ops/s':>12}{'resizes':>9}"
+          f"{'capacity':>10}{'memory':>10}{'bytes/key':>11}")
+    for name in args.maps:
+        for max_load, growth_factor in POLICIES[name]:
+            m = MAPS[name](11, function, max_load=max_load, growth_factor=growth_factor)
+            resizes = count_resizes(m)
+            gc.collect()
+            start = time.perf_counter()
+            for key in keys:
+                m.put(key, None)
+            put_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            get_time = time.perf_counter() - start
+
+            # tracing slows every allocation down, so memory is measured separately
+            capacity = m.get_capacity()
+            m = None
+            gc.collect()
+            tracemalloc.start()
+            m = MAPS[name](11, function, max_load=max_load, growth_factor=growth_factor)
+            for key in keys:
+                m.put(key, None)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            print(f"{name:<4}{max_load:>9}{growth_factor:>8}{args.n / put_time:>12.0f}{args.n / get_time:>12.0f}"
+                  f"{resizes[0]:>9}{capacity:>10}{memory / 1024:>8.0f}KB{memory / args.n:>11.1f}")
+
+
+class GlobalLockMap:
+    """
+    A hash_map_sc.HashMap shared between threads by holding one
+    lock around every call, the baseline for the striped map.
+    """
+
+    def __init__(self, capacity: int, function) -> None:
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._map.put(key, value)
+
+    def get(self, key: str) -> object:
+        with self._lock:
+            return self._map.get(key)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._map.remove(key)
+
+    def get_size(self) -> int:
+        with self._lock:
+            return self._map.get_size()
+
+
+def bench_threads(args) -> None:
+    """
+    Stress test and scaling benchmark for maps shared between threads.  The
+    n keys are split between the threads, and each thread puts its keys,
+    gets them back, removes every other one and checks what is left, all
+    at the same time as the other threads.  Any wrong value or size is
+    counted as an error.  Threads only run in parallel on free-threaded
+    builds, with the GIL the numbers show the cost of the locking.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+    contenders = {'striped': lambda: hash_map_sc_concurrent.HashMap(11, function, args.stripes),
+                  'global-lock': lambda: GlobalLockMap(11, function)}
+
+    print(f"GIL enabled: {getattr(sys, '_is_gil_enabled', lambda: True)()}")
+    print(f"{'map':<13}{'threads':>8}{'ops/sec':>12}{'speedup':>9}{'errors':>8}")
+    for name, make_map in contenders.items():
+        single = None
+        for count in args.threads:
+            m = make_map()
+            slices = [keys[thread::count] for thread in range(count)]
+            errors = []
+            barrier = threading.Barrier(count + 1)
+
+            def worker(own: list) -> None:
+                barrier.wait()
+                for key in own:
+                    m.put(key, key)
+                for key in own:
+                    if m.get(key) != key:
+                        errors.append(key)
+                for key in own[::2]:
+                    m.remove(key)
+                for index, key in enumerate(own):
+                    if m.get(key) != (None if index % 2 == 0 else key):
+                        errors.append(key)
+
+            threads = [threading.Thread(target=worker, args=(own,)) for own in slices]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            removed = sum(len(own[::2]) for own in slices)
+            if m.get_size() != args.n - removed:
+                errors.append('size')
+
+            ops_per_sec = (3 * args.n + removed) / elapsed
+            single = single or ops_per_sec
+            print(f"{name:<13}{count:>8}{ops_per_sec:>12.0f}{ops_per_sec / single:>8.2f}x{len(errors):>8}")
+
+
+def shared_reader(name: str, keys: list, results) -> None:
+    """
+    Attaches to a shared map in a worker process, gets every
+    given key and sends back the time the gets took.
+    """
+    m = hash_map_oa_shared.HashMap(name=name, create=False)
+    start = time.perf_counter()
+    for key in keys:
+        m.get(key)
+    results.put(time.perf_counter() - start)
+    m.close()
+
+
+def bench_shared(args) -> None:
+    """
+    Compares getting a map of n keys ready in a process by building a
+    private hash_map_oa.HashMap against attaching to a shared one, then
+    reports get throughput with 1 to N processes reading the shared map.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+    shared = hash_map_oa_shared.HashMap(11, function)
+    for index, key in enumerate(keys):
+        shared.put(key, index)
+
+    start = time.perf_counter()
+    private = hash_map_oa.HashMap(11, function)
+    private.put_many((key, index) for index, key in enumerate(keys))
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    attached = hash_map_oa_shared.HashMap(name=shared.get_name(), create=False)
+    attach_time = time.perf_counter() - start
+    attached.close()
+
+    print(f"{'n':>10}{'build private':>15}{'attach shared':>15}")
+    print(f"{args.n:>10}{build_time:>14.3f}s{attach_time:>14.6f}s")
+
+    print(f"{'processes':>10}{'get ops/sec':>15}")
+    for count in args.processes:
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=shared_reader, args=(shared.get_name(), keys[start::count], results))
+                   for start in range(count)]
+        for worker in workers:
+            worker.start()
+        elapsed = max(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        print(f"{count:>10}{args.n / elapsed:>15.0f}")
+
+    shared.close()
+    shared.unlink()
+
+
+def bench_file(args) -> None:
+    """
+    Compares getting a map of n keys ready by rebuilding it with
+    put_many() against opening a file written by hash_map_oa_file,
+    then times n gets against each.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+    path = os.path.join(tempfile.mkdtemp(), 'map.cs261oa')
+
+    start = time.perf_counter()
+    m = hash_map_oa.HashMap(11, function)
+    m.put_many((key, index) for index, key in enumerate(keys))
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hash_map_oa_file.write(m, path)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    f = hash_map_oa_file.HashMap(path)
+    open_time = time.perf_counter() - start
+
+    print(f"{'n':>10}{'rebuild':>12}{'write':>12}{'open':>12}{'file size':>12}")
+    print(f"{args.n:>10}{build_time:>11.3f}s{write_time:>11.3f}s{open_time:>11.6f}s"
+          f"{os.path.getsize(path) / 2 ** 20:>10.1f}MB")
+
+    print(f"{'map':<8}{'get ops/sec':>15}")
+    for name, lookup in (('memory', m), ('file', f)):
+        start = time.perf_counter()
+        for key in keys:
+            lookup.get(key)
+        print(f"{name:<8}{args.n / (time.perf_counter() - start):>15.0f}")
+
+    f.close()
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def bench_persist(args) -> None:
+    """
+    Compares saving and loading each map of n keys as its flat layout
+    (save()/load(), and pickle protocol 5 with out-of-band buffers)
+    against pickling its object graph of buckets and nodes.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+    path = os.path.join(tempfile.mkdtemp(), 'map.pickle')
+
+    print(f"{'map':<6}{'format':<14}{'dump':>10}{'load':>10}{'size':>10}")
+    for name in args.maps:
+        m = MAPS[name](11, function)
+        m.put_many((key, index) for index, key in enumerate(keys))
+
+        def object_graph():
+            # the buckets as plain objects, with the map's own options alongside
+            data = pickle.dumps(m._buckets, protocol=5)
+            return len(data), lambda: pickle.loads(data)
+
+        def flat_pickle():
+            buffers = []
+            data = pickle.dumps(m, protocol=5, buffer_callback=buffers.append)
+            size = len(data) + sum(buffer.raw().nbytes for buffer in buffers)
+            return size, lambda: pickle.loads(data, buffers=buffers)
+
+        def save_file():
+            m.save(path)
+            return os.path.getsize(path), lambda: MAPS[name].load(path)
+
+        for label, dump in (('object graph', object_graph), ('pickle 5', flat_pickle), ('save/load', save_file)):
+            gc.collect()
+            start = time.perf_counter()
+            size, load = dump()
+            dump_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load()
+            load_time = time.perf_counter() - start
+            print(f"{name:<6}{label:<14}{dump_time:>9.3f}s{load_time:>9.3f}s{size / 2 ** 20:>8.1f}MB")
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+def bench_parallel(args) -> None:
+    """
+    Scaling benchmark for hash_map_sc_parallel.find_mode_parallel().  Times
+    find_mode() and then the parallel version with each number of workers
+    on n values drawn from n / 10 keys with a Zipfian distribution, and
+    checks every run finds the same modes.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    values = zipf_choices(make_keys(max(1, args.n // 10), args.key_length), args.n)
+    da = DynamicArray(values)
+
+    def mode_set(result: tuple) -> tuple:
+        modes, frequency = result
+        return sorted(modes[index] for index in range(modes.length())), frequency
+
+    start = time.perf_counter()
+    expected = mode_set(hash_map_sc.find_mode(da))
+    single = time.perf_counter() - start
+
+    print(f"CPUs: {os.cpu_count()}, chunk size: {args.chunk_size}")
+    print(f"{'workers':<12}{'time':>10}{'speedup':>9}{'same':>6}")
+    print(f"{'find_mode':<12}{single:>9.3f}s{1:>8.2f}x{'yes':>6}")
+    for count in args.workers:
+        start = time.perf_counter()
+        result = mode_set(hash_map_sc_parallel.find_mode_parallel(iter(values), count, args.chunk_size, function))
+        elapsed = time.perf_counter() - start
+        same = 'yes' if result == expected else 'NO'
+        print(f"{count:<12}{elapsed:>9.3f}s{single / elapsed:>8.2f}x{same:>6}")
+
+
+def bench_capacity(args) -> None:
+    """
+    Regression benchmark for the SC lookup and update path.  For each
+    capacity, fills a map to the given load factor, then times n gets of
+    missing keys and n updates of present keys.  Both should cost the same
+    at every capacity, since each hashes the key once and walks one chain.
+    The keys are hashed with the built-in hash() unless --sample-hash is
+    given: the sums of code points from the sample hash functions are
+    smaller than the larger capacities, so with them the chains (avg hit
+    cost) grow with the table.
+    """
+    function = HASH_FUNCTIONS[args.function] if args.sample_hash else hash
+    missing = make_keys(args.n, args.key_length, seed=1)
+
+    print(f"{'capacity':>10}{'keys':>10}{'avg hit cost':>14}{'get-miss ns':>13}{'update ns':>11}{'vs first':>10}")
+    first = None
+    for capacity in args.capacities:
+        keys = make_keys(int(capacity * args.load), args.key_length)
+        m = hash_map_sc.HashMap(capacity, function)
+        m.put_many((key, 0) for key in keys)
+        updates = random.Random(0).choices(keys, k=args.n) if keys else []
+
+        gc.collect()
+        start = time.perf_counter()
+        for key in missing:
+            m.get(key)
+        miss_time = (time.perf_counter() - start) / args.n * 1e9
+
+        start = time.perf_counter()
+        for key in updates:
+            m.put(key, 1)
+        update_time = (time.perf_counter() - start) / max(1, len(updates)) * 1e9
+
+        first = first or (miss_time + update_time)
+        print(f"{m.get_capacity():>10}{len(keys):>10}{m.stats()['avg_hit_cost']:>14.2f}"
+              f"{miss_time:>13.0f}{update_time:>11.0f}"
+              f"{(miss_time + update_time) / first:>9.2f}x")
+        del m, keys
+
+
+def bench_upsert(args) -> None:
+    """
+    Compares counting n values drawn from n / 10 keys with a Zipfian
+    distribution using contains_key(), get() and put() for each value
+    against a single increment(), and times find_mode() on the same values.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    values = zipf_choices(make_keys(max(1, args.n // 10), args.key_length), args.n)
+
+    def three_calls(m) -> None:
+        for value in values:
+            if m.contains_key(value):
+                m.put(value, m.get(value) + 1)
+            else:
+                m.put(value, 1)
+
+    def increment(m) -> None:
+        for value in values:
+            m.increment(value)
+
+    print(f"{'map':<6}{'pattern':<14}{'ops/sec':>12}{'speedup':>9}")
+    for name in args.maps:
+        baseline = None
+        for label, count in (('3 calls', three_calls), ('increment', increment)):
+            m = MAPS[name](11, function)
+            start = time.perf_counter()
+            count(m)
+            ops_per_sec = args.n / (time.perf_counter() - start)
+            baseline = baseline or ops_per_sec
+            print(f"{name:<6}{label:<14}{ops_per_sec:>12.0f}{ops_per_sec / baseline:>8.2f}x")
+
+    start = time.perf_counter()
+    hash_map_sc.find_mode(DynamicArray(values))
+    print(f"find_mode: {args.n / (time.perf_counter() - start):.0f} values/sec")
+
+
+def bench_ttl(args) -> None:
+    """
+    Compares purging expired sessions from a hash_map_oa.HashMap of
+    (value, deadline) tuples by scanning get_keys_and_values() against
+    hash_map_oa_ttl.HashMap reclaiming them with tick().  n sessions get
+    deadlines spread over 60 seconds of a simulated clock, which is then
+    moved to 30 seconds so about half of them have expired.
+    """
+    function = HASH_FUNCTIONS[args.function]
+    keys = make_keys(args.n, args.key_length)
+    ttls = [1 + 59 * random.Random(index).random() for index in range(args.n)]
+    now = [0.0]
+
+    scanned = hash_map_oa.HashMap(11, function)
+    scanned.put_many((key, (index, ttl)) for index, (key, ttl) in enumerate(zip(keys, ttls)))
+    ttl_map = hash_map_oa_ttl.HashMap(11, function, clock=lambda: now[0])
+    for index, (key, ttl) in enumerate(zip(keys, ttls)):
+        ttl_map.put(key, index, ttl)
+    now[0] = 30.0
+
+    gc.collect()
+    start = time.perf_counter()
+    entries = scanned.get_keys_and_values()
+    scanned.remove_many(entries[index][0] for index in range(entries.length()) if entries[index][1][1] <= now[0])
+    scan_time = time.perf_counter() - start
+
+    ticks, longest = 0, 0.0
+    start = time.perf_counter()
+    while True:
+        tick_start = time.perf_counter()
+        reclaimed = ttl_map.tick(args.tick_limit)
+        longest = max(longest, time.perf_counter() - tick_start)
+        ticks += 1
+        if reclaimed == 0:
+            break
+    tick_time = time.perf_counter() - start
+
+    print(f"{'purge':<8}{'left':>10}{'total':>10}{'ticks':>8}{'longest pause':>15}")
+    print(f"{'scan':<8}{scanned.get_size():>10}{scan_time:>9.3f}s{1:>8}{scan_time:>14.4f}s")
+    print(f"{'tick':<8}{ttl_map.get_size():>10}{tick_time:>9.3f}s{ticks:>8}{longest:>14.4f}s")
+
+
+def make_sku_keys(n: int, prefix: str = 'SKU-') -> list:
+    """
+    Returns a list of n sequential product codes, such as SKU-00000042,
+    which differ only in a few trailing digits.
+    """
+    return [prefix + format(index, '08d') for index in range(n)]
+
+
+def bench_quality(args) -> None:
+    """
+    Collision quality report of every hash function in the registry on
+    random, anagram and sequential (SKU) keys, with each map.  A variance
+    ratio near 1 means keys spread over the buckets like a random hash
+    function would spread them.
+    """
+    key_sets = {'random': make_keys(args.n, args.key_length),
+                'anagram': make_anagram_keys(args.n, min(args.key_length, 10)),
+                'sku': make_sku_keys(args.n)}
+
+    print(f"{'keys':<9}{'function':<10}{'ns/key':>8}{'map':>5}{'distinct':>10}"
+          f"{'var ratio':>11}{'max bucket':>12}{'max chain/probe':>17}")
+    for key_set, keys in key_sets.items():
+        for function_name, function in HASH_REGISTRY.items():
+            start = time.perf_counter()
+            for key in keys:
+                function(key)
+            hash_time = (time.perf_counter() - start) / len(keys) * 1e9
+
+            for name in args.maps:
+                report = hash_quality(MAPS[name](11, function), keys)
+                ratio = report['bucket_variance'] / report['expected_variance']
+                longest = report['max_chain'] if 'max_chain' in report else report['max_probe_length']
+                print(f"{key_set:<9}{function_name:<10}{hash_time:>8.0f}{name:>5}{report['distinct_hashes']:>10}"
+                      f"{ratio:>11.2f}{report['max_bucket']:>12}{longest:>17}")
+
+
+def make_anagram_keys(n: int, length: int = 10, seed: int = 0) -> list:
+    """
+    Returns a list of n unique keys that are all permutations of a few
+    base words, so many of them share the same sum of code points.
+    """
+    rng = random.Random(seed)
+    bases = [''.join(rng.choices(string.ascii_lowercase, k=length)) for _ in range(max(1, n // 1000))]
+    keys = set()
+    while len(keys) < n:
+        letters = list(rng.choice(bases))
+        rng.shuffle(letters)
+        keys.add(''.join(letters))
+    return sorted(keys)
+
+
+def zipf_choices(keys: list, count: int, exponent: float = 1.1, seed: int = 0) -> list:
+    """
+    Returns count keys drawn from the list with a Zipfian distribution,
+    where the k-th key is drawn with weight 1 / k ** exponent.
+    """
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, len(keys) + 1)))
+    return rng.choices(keys, cum_weights=cumulative, k=count)
+
+
+def make_distribution(name: str, n: int, key_length: int) -> tuple:
+    """
+    Returns (keys, stream, missing) for a key distribution: n unique keys,
+    a stream of n keys drawn from them (used by the get, mixed and
+    find_mode workloads), and n keys that are not among them.
+    """
+    if name == 'anagram':
+        keys = make_anagram_keys(2 * n)
+    elif name == 'long':
+        keys = make_keys(2 * n, 256)
+    else:
+        keys = make_keys(2 * n, key_length)
+
+    random.Random(1).shuffle(keys)
+    keys, missing = keys[:n], keys[n:]
+    if name == 'zipf':
+        stream = zipf_choices(keys, n)
+    else:
+        stream = random.Random(2).choices(keys, k=n)
+    return keys, stream, missing
+
+
+def count_resizes(m) -> list:
+    """
+    Makes the map count its resize_table() calls (including rebuilds at the
+    same capacity) and returns a one item list holding the running count.
+    """
+    counter = [0]
+    resize_table = m.resize_table
+
+    def counting_resize_table(new_capacity: int) -> None:
+        counter[0] += 1
+        resize_table(new_capacity)
+
+    m.resize_table = counting_resize_table
+    return counter
+
+
+def structure_stats(m) -> dict:
+    """
+    Returns the chain lengths (SC) or probe lengths of the stored keys (OA)
+    of a map, for the maps that keep stats().
+    """
+    if isinstance(m, hash_map_sc.HashMap):
+        stats = m.stats()
+        used = stats['capacity'] - stats['empty_buckets']
+        return {'max_chain': stats['max_chain'], 'mean_chain': stats['size'] / max(1, used)}
+
+    if isinstance(m, hash_map_oa.HashMap):
+        stats = m.stats()
+        return {'max_probe': stats['max_probe_length'], 'mean_probe': stats['avg_probe_length']}
+
+    return {}
+
+
+def run_workload(workload: str, layout, function, keys: list, stream: list, missing: list) -> dict:
+    """
+    Runs one workload against a new map and returns its measurements.
+    The put workload loads the keys into an empty map, every other
+    workload starts from a map that already holds them.
+    """
+    m = layout(11, function)
+    if workload != 'put':
+        m.put_many((key, 0) for key in keys)
+    resizes = count_resizes(m)
+
+    gc.collect()
+    start = time.perf_counter()
+    if workload == 'put':
+        for key in keys:
+            m.put(key, 0)
+    elif workload == 'get-hit':
+        for key in stream:
+            m.get(key)
+    elif workload == 'get-miss':
+        for key in missing:
+            m.get(key)
+    elif workload == 'remove':
+        for key in keys:
+            m.remove(key)
+    elif workload == 'mixed':
+        # 50% get, 30% put and 20% remove, over the stream
+        for index, key in enumerate(stream):
+            if index % 10 < 5:
+                m.get(key)
+            elif index % 10 < 8:
+                m.put(key, index)
+            else:
+                m.remove(key)
+    elapsed = time.perf_counter() - start
+
+    result = {'ops_per_sec': len(keys) / elapsed, 'resizes': resizes[0]}
+    result.update(structure_stats(m))
+
+    # tracing slows every allocation down, so memory is measured separately
+    if workload == 'put':
+        m = None
+        gc.collect()
+        tracemalloc.start()
+        m = layout(11, function)
+        for key in keys:
+            m.put(key, 0)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def bench_suite(args) -> None:
+    """
+    Runs every workload against every map layout, key distribution, size
+    and hash function, printing a table and optionally writing the results
+    as JSON.  The find_mode workload runs hash_map_sc.find_mode().
+    """
+    results = []
+    print(f"{'workload':<10}{'map':<12}{'dist':<9}{'fn':>3}{'n':>8}{'ops/sec':>12}"
+          f"{'peak mem':>11}{'resizes':>9}  structure")
+    for distribution, n in itertools.product(args.distributions, args.sizes):
+        keys, stream, missing = make_distribution(distribution, n, args.key_length)
+        for function_name, workload in itertools.product(args.functions, args.workloads):
+            function = HASH_FUNCTIONS[function_name]
+
+            if workload == 'find_mode':
+                # find_mode always uses the default SC map and hash function
+                if function_name != args.functions[0]:
+                    continue
+                da = DynamicArray(stream)
+                start = time.perf_counter()
+                hash_map_sc.find_mode(da)
+                measured = [('sc', {'ops_per_sec': n / (time.perf_counter() - start)})]
+            else:
+                measured = [(name, run_workload(workload, LAYOUTS[name], function, keys, stream, missing))
+                            for name in args.layouts]
+
+            for name, result in measured:
+                result.update({'workload': workload, 'map': name, 'distribution': distribution,
+                               'function': function_name, 'n': n})
+                results.append(result)
+
+                memory = f"{result['peak_memory'] / 1024:.0f}KB" if 'peak_memory' in result else '-'
+                structure = ' '.join(f"{stat}={result[stat]:.4g}" for stat in
+                                     ('max_chain', 'mean_chain', 'max_probe', 'mean_probe') if stat in result)
+                print(f"{workload:<10}{name:<12}{distribution:<9}{function_name:>3}{n:>8}"
+                      f"{result['ops_per_sec']:>12.0f}{memory:>11}{result.get('resizes', '-'):>9}  {structure}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+def main() -> None:
+    """
+    Parse the command line and run the selected benchmark.
+    """
+    # options shared by every benchmark
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--n', type=int, default=100_000, help='number of keys')
+    common.add_argument('--key-length', type=int, default=32, help='length of each key')
+    common.add_argument('--function', choices=HASH_FUNCTIONS, default='2', help='hash function')
+    common.add_argument('--maps', nargs='+', choices=MAPS, default=list(MAPS), help='maps to run')
+
+    parser = argparse.ArgumentParser(description='Hash map benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    subparsers.add_parser('resize', parents=[common],
+                          help='resize_table() with and without rehashing').set_defaults(run=bench_resize)
+    subparsers.add_parser('bulk', parents=[common],
+                          help='put()/get() loops against put_many()/get_many()').set_defaults(run=bench_bulk)
+    subparsers.add_parser('hash', parents=[common],
+                          help='scalar hash functions against hash_keys()').set_defaults(run=bench_hash)
+    subparsers.add_parser('probe', parents=[common],
+                          help='OA probe lengths per probing mode and load factor').set_defaults(run=bench_probe)
+    subparsers.add_parser('churn', parents=[common],
+                          help='OA lookups under remove/put churn').set_defaults(run=bench_churn)
+    subparsers.add_parser('latency', parents=[common],
+                          help='single put() latency with incremental resizing').set_defaults(run=bench_latency)
+    subparsers.add_parser('memory', parents=[common],
+                          help='memory and throughput of each storage layout').set_defaults(run=bench_memory)
+    subparsers.add_parser('policy', parents=[common],
+                          help='throughput and memory of each resize policy').set_defaults(run=bench_policy)
+    threads = subparsers.add_parser('threads', parents=[common],
+                                    help='striped-lock SC map against one global lock, 1 to N threads')
+    threads.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8], help='numbers of threads')
+    threads.add_argument('--stripes', type=int, default=hash_map_sc_concurrent.STRIPES, help='lock stripes')
+    threads.set_defaults(run=bench_threads)
+    subparsers.add_parser('file', parents=[common],
+                          help='OA map file opened with mmap against a rebuild').set_defaults(run=bench_file)
+    shared = subparsers.add_parser('shared', parents=[common],
+                                   help='shared memory OA map against a private copy per process')
+    shared.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4], help='numbers of reader processes')
+    shared.set_defaults(run=bench_shared)
+    subparsers.add_parser('persist', parents=[common],
+                          help='save()/load() against pickling the object graph').set_defaults(run=bench_persist)
+    parallel = subparsers.add_parser('parallel', parents=[common],
+                                     help='find_mode() against find_mode_parallel() per worker count')
+    parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='numbers of worker processes')
+    parallel.add_argument('--chunk-size', type=int, default=hash_map_sc_parallel.CHUNK_SIZE,
+                          help='values counted by a worker at a time')
+    parallel.set_defaults(run=bench_parallel)
+    capacity = subparsers.add_parser('capacity', parents=[common],
+                                     help='SC get-miss and update cost as the capacity grows')
+    capacity.add_argument('--capacities', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+                          help='table capacities')
+    capacity.add_argument('--load', type=float, default=0.5, help='load factor each table is filled to')
+    capacity.add_argument('--sample-hash', action='store_true',
+                          help='hash with --function instead of the built-in hash()')
+    capacity.set_defaults(run=bench_capacity)
+    subparsers.add_parser('upsert', parents=[common],
+                          help='contains_key()/get()/put() counting against increment()').set_defaults(run=bench_upsert)
+    ttl = subparsers.add_parser('ttl', parents=[common],
+                                help='purging expired entries by scanning against tick()')
+    ttl.add_argument('--tick-limit', type=int, default=hash_map_oa_ttl.TICK_LIMIT,
+                     help='deadlines popped per tick()')
+    ttl.set_defaults(run=bench_ttl)
+    subparsers.add_parser('quality', parents=[common],
+                          help='collision quality of every registered hash function').set_defaults(run=bench_quality)
+    suite = subparsers.add_parser('suite', parents=[common],
+                                  help='every workload, map, key distribution, size and hash function')
+    suite.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000], help='numbers of keys')
+    suite.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS), help='maps to run')
+    suite.add_argument('--functions', nargs='+', choices=HASH_FUNCTIONS, default=['1', '2'],
+                       help='hash functions')
+    suite.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=list(DISTRIBUTIONS),
+                       help='key distributions')
+    suite.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS), help='workloads')
+    suite.add_argument('--json', help='also write the results to this JSON file')
+    suite.set_defaults(run=bench_suite)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Bounded least recently used (LRU) cache built on the hash maps.
+# A separate chaining or open addressing HashMap maps each key to its node in a
+# doubly linked recency list, most recently used first, so get(), put() and
+# evicting the least recently used entry are all O(1).  The cache is bounded by
+# a number of entries, a byte budget, or both, counts its hits, misses,
+# evictions and rejected oversized entries, and lru_cache() wraps a function
+# so its results are cached.
+
+import functools
+import sys
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+# Hash maps the cache can keep its keys in
+MAPS = {'sc': hash_map_sc.HashMap, 'oa': hash_map_oa.HashMap}
+
+
+def entry_size(key: str, value: object) -> int:
+    """
+    Default size of a cache entry for the byte budget: the shallow
+    size of its key and value, as reported by sys.getsizeof().
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUNode:
+    """
+    Node of the recency list, which is also the value stored in the hash map
+    """
+
+    __slots__ = ('key', 'value', 'size', 'prev', 'next')
+
+    def __init__(self, key: str, value: object, size: int = 0) -> None:
+        """
+        Initialize node given a key, value and its size in bytes.
+        """
+        self.key = key
+        self.value = value
+        self.size = size
+        self.prev = None
+        self.next = None
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 128, max_bytes: int = None, map: str = 'sc',
+                 function: callable = hash_function_2, sizeof: callable = entry_size) -> None:
+        """
+        Initialize an empty cache holding at most max_entries entries whose
+        sizes, as given by sizeof(key, value), add up to at most max_bytes.
+        Either limit can be None, but not both.  The keys are kept in a
+        hash map of the given kind ('sc' or 'oa').
+        """
+        if max_entries is None and max_bytes is None:
+            raise ValueError("max_entries and max_bytes cannot both be None")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, not {max_entries!r}")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1, not {max_bytes!r}")
+        if map not in MAPS:
+            raise ValueError(f"map must be one of {list(MAPS)}, not {map!r}")
+
+        self._map = MAPS[map](11, function)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+
+        # the recency list is circular around a sentinel node, whose next
+        # node is the most recently used entry and prev the least
+        self._sentinel = LRUNode(None, None)
+        self._sentinel.prev = self._sentinel.next = self._sentinel
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rejections = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output,
+        from the most to the least recently used entry
+        """
+        out = []
+        node = self._sentinel.next
+        while node is not self._sentinel:
+            out.append(str(node.key) + ': ' + str(node.value))
+            node = node.next
+        return '[' + ', '.join(out) + ']'
+
+    def get_size(self) -> int:
+        """
+        Return the number of entries in the cache
+        """
+        return self._map.get_size()
+
+    def get_bytes(self) -> int:
+        """
+        Return the total size of the entries in the cache
+        """
+        return self._bytes
+
+    # ------------------------------------------------------------------ #
+
+    def _unlink(self, node: LRUNode) -> None:
+        """
+        Removes a node from the recency list, and clears its links so
+        a node that is dropped does not keep its neighbours alive.
+        """
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        node.prev = node.next = None
+
+    def _push_front(self, node: LRUNode) -> None:
+        """
+        Links a node in as the most recently used entry.
+        """
+        node.prev = self._sentinel
+        node.next = self._sentinel.next
+        self._sentinel.next.prev = node
+        self._sentinel.next = node
+
+    def _evict(self) -> None:
+        """
+        Evicts least recently used entries until the cache is within its limits.
+        """
+        while self._map.get_size() > 0 and (
+                (self._max_entries is not None and self._map.get_size() > self._max_entries) or
+                (self._max_bytes is not None and self._bytes > self._max_bytes)):
+            node = self._sentinel.prev
+            self._unlink(node)
+            self._map.remove(node.key)
+            self._bytes -= node.size
+            self._evictions += 1
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value cached for the given key, and marks it as the
+        most recently used entry.  If the key is not in the cache, the
+        default value is returned.
+        """
+        node = self._map.get(key)
+        if node is None:
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        self._unlink(node)
+        self._push_front(node)
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the cache, otherwise returns
+        False.  This does not count as a use of the entry.
+        """
+        return self._map.contains_key(key)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Caches the value for the given key as the most recently used entry,
+        then evicts the least recently used entries while the cache is over
+        its limits.  An entry bigger than the whole byte budget is rejected
+        without evicting anything else, and any old entry for the key is
+        removed, since it no longer holds the key's value.
+        """
+        size = self._sizeof(key, value) if self._max_bytes is not None else 0
+        if self._max_bytes is not None and size > self._max_bytes:
+            self.remove(key)
+            self._rejections += 1
+            return
+
+        # one lookup either finds the key's node or inserts the new one
+        candidate = LRUNode(key, value, size)
+        node = self._map.setdefault(key, candidate)
+        if node is candidate:
+            self._bytes += size
+        else:
+            self._bytes += size - node.size
+            node.value, node.size = value, size
+            self._unlink(node)
+
+        self._push_front(node)
+        self._evict()
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key from the cache.  If the key is not in
+        the cache, the method does nothing.
+        """
+        # one lookup finds and removes the key's node
+        node = self._map.pop(key)
+        if node is None:
+            return
+
+        self._unlink(node)
+        self._bytes -= node.size
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.  The counters are kept.
+        """
+        self._map.clear()
+        self._sentinel.prev = self._sentinel.next = self._sentinel
+        self._bytes = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray of (key, value) tuples for every entry,
+        from the most to the least recently used.
+        """
+        key_value_pair = DynamicArray()
+        node = self._sentinel.next
+        while node is not self._sentinel:
+            key_value_pair.append((node.key, node.value))
+            node = node.next
+
+        return key_value_pair
+
+    def stats(self) -> dict:
+        """
+        Returns a dictionary of the cache's counters and limits:
+
+        hits, misses, evictions   counted since the cache was created
+        rejections                entries put bigger than max_bytes, never cached
+        hit_ratio                 hits / (hits + misses)
+        size, bytes               current number of entries and their total size
+        max_entries, max_bytes    the limits the cache was created with
+        """
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'rejections': self._rejections,
+            'hit_ratio': self._hits / lookups if lookups > 0 else 0.0,
+            'size': self._map.get_size(),
+            'bytes': self._bytes,
+            'max_entries': self._max_entries,
+            'max_bytes': self._max_bytes,
+        }
+
+
+def lru_cache(max_entries: int = 128, max_bytes: int = None, map: str = 'sc',
+              function: callable = hash_function_2, sizeof: callable = entry_size):
+    """
+    Decorator that caches the results of a function in an LRUCache with the
+    given options.  The cache key is the repr() of the call's arguments, so
+    arguments with the same repr share a result.  The cache is available as
+    the wrapper's cache attribute.
+    """
+    def decorator(wrapped: callable) -> callable:
+        cache = LRUCache(max_entries, max_bytes, map, function, sizeof)
+        missing = object()
+
+        @functools.wraps(wrapped)
+        def wrapper(*args, **kwargs):
+            key = repr((args, sorted(kwargs.items()))) if kwargs else repr(args)
+            result = cache.get(key, missing)
+            if result is missing:
+                result = wrapped(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nLRU - 3 entries")
+    print("-------------------")
+    cache = LRUCache(3)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    cache.get('a')
+    cache.put('d', 'D')
+    print(cache, cache.contains_key('b'))
+    print("Expected result is: [d: D, a: A, c: C] False")
+
+    print("\nLRU - 200 byte budget, open addressing")
+    print("-------------------")
+    cache = LRUCache(None, 200, 'oa')
+    for i in range(10):
+        cache.put(str(i), 'x' * 20)
+    print(cache.get_size(), cache.get_bytes(), cache.stats()['evictions'])
+
+    print("\nlru_cache - fibonacci")
+    print("-------------------")
+
+    @lru_cache(max_entries=64)
+    def fibonacci(n: int) -> int:
+        return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+    print(fibonacci(80), fibonacci.cache.stats())
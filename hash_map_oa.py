@@ -5,19 +5,67 @@
 # Due Date: 12/2/2022
 # Description: Implement an open addressing Hash Map with the following methods:
 # put(), table_load(), empty_buckets(), resize_table(), get(), contains_key(),
-# remove(), clear(), get_keys_and_values(), __iter()__ and __next()__.
+# remove(), clear(), get_keys_and_values(), __iter()__ and __next()__, plus the
+# bulk methods put_many(), get_many() and remove_many(), stats() and shrink_to_fit().
+
+from array import array
 
 from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+                        batch_to_list, flat_buffer, flat_hashes, hash_function_1, hash_function_2,
+                        hash_keys, load_pickle, save_pickle, unflat_array)
+
+
+# Collision resolution modes supported by the HashMap
+PROBING_MODES = ('quadratic', 'robin_hood')
+
+# Bucket states of the flat layout the HashMap is pickled as
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, probing: str = 'quadratic',
+                 tombstone_limit: float = 0.25, incremental: bool = False,
+                 migration_step: int = 16, max_load: float = 0.5,
+                 growth_factor: float = 2, shrink_load: float = None) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+
+        With probing='robin_hood', entries that are further from their home
+        bucket take buckets from entries that are closer to theirs, and a
+        lookup for a missing key stops as soon as it passes an entry that
+        is closer to home than the key would be.
+
+        Once the number of tombstones passes tombstone_limit times the
+        capacity, the table is rebuilt in place at the same capacity to
+        reclaim them.  A tombstone_limit of None never rebuilds.
+
+        With incremental=True, growing the table no longer re-inserts every
+        entry in one call.  The new table is allocated, and the entries are
+        then moved into it, a few (migration_step) buckets at a time on every
+        put(), get(), contains_key() and remove(), with lookups checking both
+        tables until the move is done.
+
+        The table grows by growth_factor (rounded up to a prime) once the load
+        factor reaches max_load.  With a shrink_load, removing keys until the
+        load factor falls below it shrinks the table so the load factor is back
+        halfway between shrink_load and max_load, down to no less than the
+        starting capacity, and clear() goes back to the starting capacity.
+        shrink_load must be less than max_load / growth_factor, so that
+        neither a grow nor a shrink leaves the table ready to resize again.
         """
+        if probing not in PROBING_MODES:
+            raise ValueError(f"probing must be one of {PROBING_MODES}, not {probing!r}")
+        if not 0 < max_load < 1:
+            raise ValueError(f"max_load must be between 0 and 1, not {max_load!r}")
+        if growth_factor <= 1:
+            raise ValueError(f"growth_factor must be greater than 1, not {growth_factor!r}")
+        if shrink_load is not None and not 0 <= shrink_load < max_load / growth_factor:
+            raise ValueError(f"shrink_load must be at least 0 and less than max_load / growth_factor, "
+                             f"not {shrink_load!r}")
+
         self._buckets = DynamicArray()
 
         # capacity must be a prime number
@@ -26,7 +74,32 @@ class HashMap:
             self._buckets.append(None)
 
         self._hash_function = function
+        self._probing = probing
+        self._tombstone_limit = tombstone_limit
         self._size = 0
+        self._tombstones = 0
+
+        # resize policy, the table never shrinks below its starting capacity
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+        self._shrink_load = shrink_load
+        self._min_capacity = self._capacity
+
+        # histogram of the probe distances of the live entries in the table,
+        # distance_counts[j] is the number of entries found j probes past their
+        # home bucket, kept up to date on every insert and remove so stats()
+        # never has to scan the table
+        self._distance_counts = []
+
+        # state of an incremental resize, the new table while it is being
+        # allocated and the old table while its entries are being moved
+        self._incremental = incremental
+        self._migration_step = migration_step
+        self._new_buckets = None
+        self._new_capacity = 0
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._migrate_index = 0
 
     def __str__(self) -> str:
         """
@@ -85,6 +158,12 @@ class HashMap:
         """
         return self._capacity
 
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones (removed entries) in the table
+        """
+        return self._tombstones
+
     # ------------------------------------------------------------------ #
 
     def put(self, key: str, value: object) -> None:
@@ -96,62 +175,237 @@ class HashMap:
         pair is added.
 
         When the current load factor is >= 0.5, double
-        the current capacity.
+        the current capacity (or, when they are set, grow
+        it by growth_factor at max_load).
+        """
+        # hash the key once, the hash is cached in the entry from here on
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash_value: int, update=None) -> object:
+        """
+        Performs put() for a key whose full hash is already known.
+        Used by resize_table() so the hash function never runs again
+        for keys that are already stored in the hash map.  Returns the
+        value stored (see _insert_hashed() for update).
         """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
+
+        if self.table_load() >= self._max_load:
+            self._grow()
 
-        if self.table_load() >= 0.5:
-            self.resize_table(self._capacity * 2)
+        return self._insert_hashed(key, value, hash_value, update)
+
+    def _insert_hashed(self, key: str, value: object, hash_value: int, update=None) -> object:
+        """
+        Inserts or updates a key whose full hash is already known, without
+        checking the load factor, and returns the value stored.  Without
+        update, the key's value is set to value.  With update, it is set to
+        update(current value), or to update(value) if the key is not in the
+        hash map yet, all in the same walk of the probe sequence.  If the
+        probe sequence wraps around without finding an empty bucket, the
+        table is doubled and the insert retried.
+        """
+        # during an incremental resize, a key still in the old table is updated there
+        if self._old_buckets is not None:
+            entry = self._find_in_table(self._old_buckets, self._old_capacity, key, hash_value)
+            if entry is not None:
+                entry.value = value if update is None else update(entry.value)
+                return entry.value
 
-        # hash the key
-        hash_value = self._hash_function(key)
+        if self._probing == 'robin_hood':
+            return self._robin_hood_insert(key, value, hash_value, update)
 
         # modulo is equal to the capacity of the hash table
         modulo_value = self._capacity
 
         # find the index of the insert location
-        insert_location = hash_value % modulo_value
-
-        # get value at bucket to verify if None
+        initial_location = hash_value % modulo_value
+        insert_location = initial_location
         bucket = self._buckets[insert_location]
 
-        # verify if the index already has the key in it
-        if bucket is None:
-            self._buckets[insert_location] = HashEntry(key, value)
-            self._size += 1
+        # j is the variable to store the quadratic probing
+        j = 0
+        while bucket is not None:
+
+            # the key is already in the table, update the value (cached hashes are
+            # compared first) and if it was removed, make it valid and update size
+            if bucket.hash == hash_value and bucket.key == key:
+                if bucket.is_tombstone is True:
+                    bucket.value = value if update is None else update(value)
+                    bucket.is_tombstone = False
+                    self._size += 1
+                    self._tombstones -= 1
+                    self._count_distance(bucket.distance, 1)
+                else:
+                    bucket.value = value if update is None else update(bucket.value)
+                return bucket.value
+
+            # the probe sequence has wrapped around, so make room and try again
+            j += 1
+            if j >= modulo_value:
+                self.resize_table(self._capacity * 2)
+                return self._insert_hashed(key, value, hash_value, update)
+
+            insert_location = (initial_location + (j ** 2)) % modulo_value
+            bucket = self._buckets[insert_location]
+
+        # not a duplicate key, so create the new entry
+        if update is not None:
+            value = update(value)
+        entry = HashEntry(key, value, hash_value)
+        entry.distance = j
+        self._buckets[insert_location] = entry
+        self._size += 1
+        self._count_distance(j, 1)
+        return value
 
-        # verify the key is unique, if not update the value
-        elif self._buckets[insert_location].key == key and self._buckets[insert_location].is_tombstone is False:
-            self._buckets[insert_location].value = value
+    def _robin_hood_insert(self, key: str, value: object, hash_value: int, update=None) -> object:
+        """
+        Robin Hood version of _insert_hashed().  Walking the probe sequence,
+        the entry being placed takes the first empty bucket, or the first
+        bucket whose entry is closer to its own home bucket, in which case
+        that entry is displaced and continues along its own probe sequence.
+        The same walk looks for the key, so a miss is only probed once.
+        """
+        modulo_value = self._capacity
 
-        # see if the key was a removed value, if so, make it valid and update size and tombstone
-        elif self._buckets[insert_location].key == key and self._buckets[insert_location].is_tombstone is True:
-            self._buckets[insert_location].value = value
-            self._buckets[insert_location].is_tombstone = False
-            self._size += 1
+        # look for the key up to the bucket a lookup would stop at (an empty
+        # one, or one closer to its home than j), remembering the first
+        # tombstone on the way as close to home as j, which the entry can take
+        tombstone_location = None
+        j = 0
+        while j < modulo_value:
+            insert_location = (hash_value + (j ** 2)) % modulo_value
+            bucket = self._buckets[insert_location]
+            if bucket is None or bucket.distance < j:
+                break
+
+            # the key is already in the table, update the value
+            if bucket.is_tombstone is False:
+                if bucket.hash == hash_value and bucket.key == key:
+                    bucket.value = value if update is None else update(bucket.value)
+                    return bucket.value
+            elif tombstone_location is None and bucket.distance == j:
+                tombstone_location, tombstone_distance = insert_location, j
 
-        else:
-            # j is the variable to store the quadratic probing
-            j = 1
-            while bucket is not None:
-                insert_location = (hash_value + (j ** 2)) % modulo_value
-                bucket = self._buckets[insert_location]
-                j += 1
-                # check if duplicate key, if so continue
-                if self._buckets[insert_location] is not None and self._buckets[insert_location].key == key:
-                    # update value if no tombstone
-                    if self._buckets[insert_location].is_tombstone is False:
-                        self._buckets[insert_location].value = value
-                        return
-                    # check if the key is a tombstone
-                    if self._buckets[insert_location].is_tombstone is True:
-                        self._buckets[insert_location].value = value
-                        self._buckets[insert_location].is_tombstone = False
-                        self._size += 1
-                        return
-
-            # not a duplicate key, so create the new entry
-            self._buckets[insert_location] = HashEntry(key, value)
-            self._size += 1
+            j += 1
+
+        if update is not None:
+            value = update(value)
+        entry = HashEntry(key, value, hash_value)
+        self._size += 1
+
+        # a tombstone passed on the way is the first bucket the entry can take
+        if tombstone_location is not None:
+            self._tombstones -= 1
+            entry.distance = tombstone_distance
+            self._buckets[tombstone_location] = entry
+            self._count_distance(tombstone_distance, 1)
+            return value
+
+        # otherwise place it from where the walk stopped, where j is the
+        # probe distance of the entry currently being placed
+        while j < modulo_value:
+            insert_location = (entry.hash + (j ** 2)) % modulo_value
+            bucket = self._buckets[insert_location]
+
+            # empty bucket, or a tombstone at least as close to home, take it
+            if bucket is None or (bucket.is_tombstone is True and bucket.distance <= j):
+                if bucket is not None:
+                    self._tombstones -= 1
+                entry.distance = j
+                self._buckets[insert_location] = entry
+                self._count_distance(j, 1)
+                return value
+
+            # the entry here is closer to home, swap and keep placing it instead
+            if bucket.distance < j:
+                entry.distance = j
+                self._buckets[insert_location] = entry
+                self._count_distance(j, 1)
+                self._count_distance(bucket.distance, -1)
+                entry, j = bucket, bucket.distance
+
+            j += 1
+
+        # the probe sequence has wrapped around, so make room and place the
+        # entry that is still in hand (it is not counted in the table yet)
+        self._size -= 1
+        self.resize_table(self._capacity * 2)
+        self._robin_hood_insert(entry.key, entry.value, entry.hash)
+        return value
+
+    def _find_entry(self, key: str, hash_value: int) -> HashEntry:
+        """
+        Returns the live entry for a key whose full hash is already known,
+        or None if the key is not in the hash map.
+        """
+        entry = self._find_in_table(self._buckets, self._capacity, key, hash_value)
+
+        # during an incremental resize, the key may still be in the old table
+        if entry is None and self._old_buckets is not None:
+            entry = self._find_in_table(self._old_buckets, self._old_capacity, key, hash_value)
+
+        return entry
+
+    def _find_in_table(self, buckets: DynamicArray, capacity: int, key: str, hash_value: int) -> HashEntry:
+        """
+        Returns the live entry for a key whose full hash is already known
+        from the given table, or None if the key is not in that table.
+        """
+        # modulo is equal to the capacity of the hash table
+        modulo_value = capacity
+        robin_hood = self._probing == 'robin_hood'
+
+        # find the index of the first probe location
+        initial_location = hash_value % modulo_value
+        probe = buckets[initial_location]
+
+        # probe being None means the key is not in the hash map, tombstones
+        # are skipped over since the key may have been placed past them
+        j = 0
+        while probe is not None:
+
+            # in Robin Hood mode the key would have displaced any entry that
+            # is closer to its home bucket, so the key is not in the hash map
+            if robin_hood and probe.distance < j:
+                return None
+
+            # cached hashes are compared before the keys themselves
+            if probe.hash == hash_value and probe.key == key and probe.is_tombstone is False:
+                return probe
+
+            # find next probe location and update probe variable
+            j += 1
+            if j >= modulo_value:
+                return None
+            probe = buckets[(initial_location + (j ** 2)) % modulo_value]
+
+        return None
+
+    def _probe_length(self, key: str, hash_value: int) -> int:
+        """
+        Returns the number of buckets a lookup for the given key examines,
+        following the same rules as _find_entry().
+        """
+        modulo_value = self._capacity
+        robin_hood = self._probing == 'robin_hood'
+        initial_location = hash_value % modulo_value
+        probe = self._buckets[initial_location]
+
+        j = 0
+        while probe is not None:
+            if robin_hood and probe.distance < j:
+                return j + 1
+            if probe.hash == hash_value and probe.key == key and probe.is_tombstone is False:
+                return j + 1
+            j += 1
+            if j >= modulo_value:
+                return j
+            probe = self._buckets[(initial_location + (j ** 2)) % modulo_value]
+
+        return j + 1
 
     def table_load(self) -> float:
         """
@@ -166,18 +420,11 @@ class HashMap:
         """
         Returns the number of empty buckets in the hash table.
         """
-        # initialize counter
-        count = 0
-
-        # iterate through the DynamicArray
-        for index in range(self._buckets.length()):
-
-            # check if the current index of DynamicArray is None
-            current_bucket = self._buckets.get_at_index(index)
-            if current_bucket is None:
-                count += 1
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
 
-        return count
+        # every bucket that is not empty holds a live entry or a tombstone
+        return self._capacity - self._size - self._tombstones
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -197,142 +444,380 @@ class HashMap:
         if new_capacity < self._size or new_capacity < 1:
             return
 
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
         # check if new capacity is prime, if not set to next prime number
         if not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
         # create a new hash map to store the resized map
-        new_map = HashMap(new_capacity, self._hash_function)
+        new_map = HashMap(new_capacity, self._hash_function, self._probing, self._tombstone_limit,
+                          max_load=self._max_load, growth_factor=self._growth_factor)
 
-        # iterate through the old hash map to rehash the values
+        # iterate through the old hash map to move the values, reusing the
+        # cached hashes so the hash function is never run again
         for index in range(self._capacity):
-            if self._buckets[index] is not None and self._buckets[index].is_tombstone is False:
-                new_map.put(self._buckets[index].key, self._buckets[index].value)
+            entry = self._buckets[index]
+            if entry is not None and entry.is_tombstone is False:
+                new_map._put_hashed(entry.key, entry.value, entry.hash)
 
-        # update capacity, buckets to match the new hash map
+        # update capacity, buckets to match the new hash map, which has no tombstones
         self._capacity = new_map._capacity
         self._buckets = new_map._buckets
+        self._tombstones = 0
+        self._distance_counts = new_map._distance_counts
 
     def get(self, key: str) -> object:
         """
         Returns the value associated with a given key.  If a key
         is not in the hash map, return None.
         """
-        # first get the key value
-        key_value_unmodified = self._hash_function(key)
-
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
-
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
-        initial_location = insert_location
-        probe = self._buckets.get_at_index(insert_location)
-
-        if self._buckets[insert_location] is not None and self._buckets[insert_location].is_tombstone is False:
-            if self._buckets[insert_location].key == key:
-                return self._buckets[insert_location].value
-
-            else:
-                # probe being None means the key is not in the hash map
-                j = 1
-                while probe is not None:
-                    insert_location = (initial_location + (j ** 2)) % modulo_value
-
-                    # if a quadratic probe finds a duplicate key, update value
-                    if probe.key == key and probe.is_tombstone is False:
-                        return probe.value
-
-                    # find next probe location and update probe variable
-                    probe = self._buckets.get_at_index(insert_location)
-                    j += 1
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
 
-        else:
+        # hash the key and probe for its entry
+        entry = self._find_entry(key, self._hash_function(key))
+        if entry is None:
             return None
 
+        return entry.value
+
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map,
         otherwise return False.  An empty hash map does
         not contain any keys.
         """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
+
         # first check if the hash map is empty, return False
         if self._size == 0:
             return False
 
-        # get the key value
-        key_value_unmodified = self._hash_function(key)
+        # hash the key and probe for its entry
+        return self._find_entry(key, self._hash_function(key)) is not None
 
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from
+        the hash map.  If the key is not in the hash map,
+        the method does nothing.
+        """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
 
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
-        initial_location = insert_location
-        probe = self._buckets.get_at_index(insert_location)
+        # first check if the hash map is empty, return
+        if self._size == 0:
+            return
+
+        # hash the key and remove its entry
+        self._remove_hashed(key, self._hash_function(key))
+        self._shrink_if_sparse()
+
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key from the hash map and returns its value, with
+        one hash and one walk of its probe sequence.  If the key is not in
+        the hash map, the default value is returned.
+        """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
+
+        if self._size == 0:
+            return default
 
-        if self._buckets[insert_location] is not None and self._buckets[insert_location].is_tombstone is False:
-            if self._buckets[insert_location].key == key:
-                return True
+        value = self._remove_hashed(key, self._hash_function(key), default)
+        self._shrink_if_sparse()
+        return value
 
-            else:
-                # probe being None means the key is not in the hash map
-                j = 1
-                while probe is not None:
-                    insert_location = (initial_location + (j ** 2)) % modulo_value
+    def _remove_hashed(self, key: str, hash_value: int, default: object = None) -> object:
+        """
+        Removes a key whose full hash is already known, if it is in the hash
+        map, and returns its value, or default if it was not there.
+        """
+        # if we find the key, decrement size and mark tombstone to True
+        entry = self._find_in_table(self._buckets, self._capacity, key, hash_value)
+        if entry is not None:
+            value = entry.value
+            self._remove_entry(entry)
+            return value
+
+        # during an incremental resize, the key may still be in the old table,
+        # whose tombstones are not counted since the whole table is dropped
+        if self._old_buckets is not None:
+            entry = self._find_in_table(self._old_buckets, self._old_capacity, key, hash_value)
+            if entry is not None:
+                value = entry.value
+                entry.is_tombstone = True
+                entry.value = None
+                self._size -= 1
+                return value
 
-                    # if a quadratic probe finds key, return value
-                    if probe.key == key and probe.is_tombstone is False:
-                        return True
+        return default
 
-                    # find next probe location and update probe variable
-                    probe = self._buckets.get_at_index(insert_location)
-                    j += 1
+    def _remove_entry(self, entry: HashEntry) -> None:
+        """
+        Marks a live entry as a tombstone and drops its value, so the value
+        is freed now rather than when the tombstone is.  When there are too
+        many tombstones, the table is rebuilt at the same capacity, which
+        leaves none behind.
+        """
+        entry.is_tombstone = True
+        entry.value = None
+        self._size -= 1
+        self._tombstones += 1
+        self._count_distance(entry.distance, -1)
 
-        return False
+        if self._tombstone_limit is not None and self._tombstones > self._tombstone_limit * self._capacity:
+            self.resize_table(self._capacity)
 
-    def remove(self, key: str) -> None:
+    def _grow(self) -> None:
         """
-        Removes the given key and its associated value from
-        the hash map.  If the key is not in the hash map,
-        the method does nothing.
+        Multiplies the capacity of the hash table by growth_factor.
         """
-        # first check if the hash map is empty, return
-        if self._size == 0:
+        self._resize_to(max(self._capacity + 1, int(self._capacity * self._growth_factor)))
+
+    def _resize_to(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table, all at once or,
+        in incremental mode, by starting an incremental resize.
+        """
+        if self._incremental is False:
+            self.resize_table(new_capacity)
+
+        # only one incremental resize can be in progress at a time
+        elif self._new_buckets is None and self._old_buckets is None:
+            self._new_buckets = DynamicArray()
+            self._new_capacity = self._next_prime(new_capacity)
+            self._migrate_step()
+
+    def _shrink_if_sparse(self) -> None:
+        """
+        Shrinks the hash table when the load factor has fallen below
+        shrink_load, to the capacity that puts the load factor halfway
+        between shrink_load and max_load.  The gap between the two
+        thresholds keeps the table from resizing back and forth.
+        Nothing shrinks while an incremental resize is in progress.
+        """
+        if self._shrink_load is None or self._capacity <= self._min_capacity:
             return
 
-        # first get the key value
-        key_value_unmodified = self._hash_function(key)
+        if self._new_buckets is not None or self._old_buckets is not None:
+            return
 
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
+        if self.table_load() < self._shrink_load:
+            new_capacity = max(self._min_capacity, self._fit_capacity((self._shrink_load + self._max_load) / 2))
+            if self._next_prime(new_capacity) < self._capacity:
+                self._resize_to(new_capacity)
 
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
+    def _fit_capacity(self, load: float) -> int:
+        """
+        Returns the smallest capacity that holds the current
+        keys with a load factor below the given one.
+        """
+        return int(self._size / load) + 1
 
-        # j stores the quadratic probing value
-        j = 1
+    def shrink_to_fit(self) -> None:
+        """
+        Resizes the hash table, all at once, to the smallest prime capacity
+        that holds the current keys below max_load.  This can go below the
+        starting capacity, and the next put() of a new key may grow it again.
+        """
+        self.resize_table(self._fit_capacity(self._max_load))
 
-        # search for the key until we hit a None value, meaning the key is not in the hash map
-        while self._buckets[insert_location] is not None:
+    def _migrate_step(self) -> None:
+        """
+        Does a bounded amount of the work of an incremental resize: first the
+        new table is allocated a few buckets at a time, then the entries of
+        the old table are moved into it migration_step buckets at a time.
+        """
+        # allocate part of the new table, once it is complete it becomes the
+        # main table and the current one becomes the old table
+        if self._new_buckets is not None:
+            missing = self._new_capacity - self._new_buckets.length()
+            for _ in range(min(missing, 4 * self._migration_step)):
+                self._new_buckets.append(None)
+
+            if self._new_buckets.length() == self._new_capacity:
+                self._old_buckets, self._old_capacity = self._buckets, self._capacity
+                self._buckets, self._capacity = self._new_buckets, self._new_capacity
+                self._new_buckets = None
+                self._migrate_index = 0
+                self._tombstones = 0
+                self._distance_counts = []
+
+        # move the live entries of the next few buckets of the old table, reusing
+        # the cached hashes.  Moved entries are left behind as tombstones so the
+        # probe sequences through the old table stay intact until it is dropped
+        # (the old table is checked on every pass, since an insert that has to
+        # grow the table finishes the whole resize before it returns)
+        elif self._old_buckets is not None:
+            stop = min(self._old_capacity, self._migrate_index + self._migration_step)
+            while self._old_buckets is not None and self._migrate_index < stop:
+                entry = self._old_buckets[self._migrate_index]
+                self._migrate_index += 1
+                if entry is not None and entry.is_tombstone is False:
+                    entry.is_tombstone = True
+                    self._size -= 1
+                    self._insert_hashed(entry.key, entry.value, entry.hash)
+
+            if self._migrate_index == self._old_capacity:
+                self._old_buckets = None
+
+    def _finish_resize(self) -> None:
+        """
+        Completes any incremental resize in progress.
+        """
+        while self._new_buckets is not None or self._old_buckets is not None:
+            self._migrate_step()
 
-            # if we find the key, decrement size and mark tombstone to True
-            if self._buckets[insert_location].key == key and self._buckets[insert_location].is_tombstone is False:
-                self._buckets[insert_location].is_tombstone = True
-                self._size -= 1
-                return
+    def _count_distance(self, distance: int, change: int) -> None:
+        """
+        Adds change to the number of live entries at the given
+        probe distance in the probe distance histogram.
+        """
+        counts = self._distance_counts
+        while len(counts) <= distance:
+            counts.append(0)
+        counts[distance] += change
 
-            # insert location has the quadratic probing
-            insert_location = (key_value_unmodified + (j ** 2)) % self._capacity
+    def stats(self, clusters: bool = False) -> dict:
+        """
+        Returns a dict of statistics about the shape of the hash table,
+        read from counts that are kept up to date on every insert and
+        remove, so by default it does not scan the table:
 
-            # increment quadratic probe to the next one
-            j += 1
+        probe_distances    list where index j is the number of live entries j probes from home
+        max_probe_length   most buckets examined by a get() of a stored key
+        avg_probe_length   average buckets examined by a get() of a stored key
+        tombstone_ratio    fraction of the buckets holding a tombstone
+
+        With clusters=True the table is scanned once to also return
+        cluster_sizes, a dict from the length of each run of adjacent
+        non-empty buckets (live or tombstone) to the number of such runs.
+
+        During an incremental resize the counts describe the new table,
+        and pending is the number of entries still waiting in the old one.
+        """
+        counts = list(self._distance_counts)
+        while len(counts) > 0 and counts[-1] == 0:
+            counts.pop()
+
+        # an entry j probes from home is found on the (j + 1)th bucket examined
+        stored = sum(counts)
+        probes = sum((distance + 1) * count for distance, count in enumerate(counts))
+
+        result = {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load_factor': self.table_load(),
+            'tombstones': self._tombstones,
+            'tombstone_ratio': self._tombstones / self._capacity,
+            'probe_distances': counts,
+            'max_probe_length': len(counts),
+            'avg_probe_length': probes / stored if stored > 0 else 0.0,
+            'pending': self._size - stored,
+        }
+
+        if clusters is True:
+            result['cluster_sizes'] = self._cluster_sizes()
+
+        return result
+
+    def _cluster_sizes(self) -> dict:
+        """
+        Returns a dict from run length to the number of runs of adjacent
+        non-empty buckets in the table, where a run that reaches the end
+        of the table continues at its start.
+        """
+        sizes = {}
+        run = 0
+        first_run = None
+        for index in range(self._capacity):
+            if self._buckets[index] is not None:
+                run += 1
+                continue
+
+            # an empty bucket ends the current run, the first run is held back
+            # in case the last run wraps around into it
+            if first_run is None:
+                first_run = run
+            elif run > 0:
+                sizes[run] = sizes.get(run, 0) + 1
+            run = 0
+
+        # the table has no empty bucket at all, it is one run
+        if first_run is None:
+            return {run: 1} if run > 0 else {}
+
+        run += first_run
+        if run > 0:
+            sizes[run] = sizes.get(run, 0) + 1
+
+        return sizes
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates the hash map with every (key, value) pair in the given
+        iterable (or DynamicArray).  The table is resized at most once,
+        up front, so that the load factor stays below max_load for the
+        whole batch, and each pair is then inserted without further checks.
+        """
+        pairs = batch_to_list(pairs)
+
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
+        # pre-size for the worst case where every key in the batch is new
+        if self._size + len(pairs) >= self._capacity * self._max_load:
+            self.resize_table(int((self._size + len(pairs)) / self._max_load) + 1)
+
+        # hash the whole batch in one (vectorized, when possible) pass
+        hashes = hash_keys(self._hash_function, [key for key, value in pairs])
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._insert_hashed(key, value, hash_value)
+
+    def get_many(self, keys, default: object = None) -> DynamicArray:
+        """
+        Returns a DynamicArray holding the value of every key in the given
+        iterable (or DynamicArray), in input order.  Keys that are not in
+        the hash map get the default value.
+        """
+        keys = batch_to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            entry = self._find_entry(key, hash_value)
+            values.append(default if entry is None else entry.value)
+
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in the given iterable (or DynamicArray) from the
+        hash map.  Keys that are not in the hash map are ignored.  The
+        table shrinks at most once, after the whole batch is removed.
+        """
+        keys = batch_to_list(keys)
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            if self._size == 0:
+                break
+
+            self._remove_hashed(key, hash_value)
+
+        self._shrink_if_sparse()
 
     def clear(self) -> None:
         """
         Clears the content of the hash map without changing
-        the underlying hash table capacity.
+        the underlying hash table capacity (unless the map
+        has a shrink_load).
         """
+        # when the map shrinks, an empty map goes back to its starting capacity
+        if self._shrink_load is not None:
+            self._capacity = self._min_capacity
+
         # create a new DynamicArray to replace the existing in our Hash Map
         self._buckets = DynamicArray()
 
@@ -340,8 +825,34 @@ class HashMap:
         for index in range(self._capacity):
             self._buckets.append(None)
 
-        # set our size of our Hash Map back to 0
+        # set our size of our Hash Map back to 0 and drop any incremental resize
         self._size = 0
+        self._tombstones = 0
+        self._distance_counts = []
+        self._new_buckets = None
+        self._old_buckets = None
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the value of the given key, which is inserted with a
+        value of delta if it is not in the hash map, and returns the new value.
+        """
+        return self._put_hashed(key, 0, self._hash_function(key), lambda count: count + delta)
+
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value of the given key.  If the key is not in the hash
+        map, it is inserted with the default value, which is returned.
+        """
+        return self._put_hashed(key, default, self._hash_function(key), lambda value: value)
+
+    def upsert(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Sets the value of the given key to function(value), or to
+        function(default) if the key is not in the hash map, and returns
+        the new value.  If function raises, the hash map is unchanged.
+        """
+        return self._put_hashed(key, default, self._hash_function(key), function)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -349,6 +860,9 @@ class HashMap:
         tuple of a key/value pair stored in the hash map.
         Order does not matter.
         """
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
         # make a new DynamicArray to store all the (key, value) pairs
         key_value_pair = DynamicArray()
 
@@ -365,6 +879,8 @@ class HashMap:
         """
         Enables the hash map to iterate across itself.
         """
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
 
         # set a variable to track the iterations
         self._index = 0
@@ -397,6 +913,98 @@ class HashMap:
 
         return value
 
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickles the hash map as its flat layout: the state of every bucket
+        (empty, live or tombstone) and the probe distance of every entry and
+        tombstone, then the cached hash, key and value of every live entry in
+        bucket order.  Removed keys and values are never written.  With protocol 5 the states,
+        hashes and distances are out-of-band buffers.  Unpickling puts every
+        entry back in the same bucket without running the hash function.
+        """
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
+        states, hashes, distances, keys, values = array('B'), [], array('Q'), [], []
+        for index in range(self._capacity):
+            entry = self._buckets[index]
+            if entry is None:
+                states.append(EMPTY)
+                continue
+
+            # a tombstone only keeps its probe distance, which lookups still use
+            distances.append(entry.distance)
+            if entry.is_tombstone is True:
+                states.append(TOMBSTONE)
+                continue
+
+            states.append(LIVE)
+            hashes.append(entry.hash)
+            keys.append(entry.key)
+            values.append(entry.value)
+
+        options = {'probing': self._probing, 'tombstone_limit': self._tombstone_limit,
+                   'incremental': self._incremental, 'migration_step': self._migration_step,
+                   'max_load': self._max_load, 'growth_factor': self._growth_factor,
+                   'shrink_load': self._shrink_load}
+        return _restore, (self._capacity, self._min_capacity, self._hash_function, options,
+                          flat_buffer(states, protocol), flat_buffer(flat_hashes(hashes), protocol),
+                          flat_buffer(distances, protocol), keys, values)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the hash map to a file, as its flat layout (see __reduce_ex__)
+        with the states, hashes and distances written raw after the pickle stream.
+        """
+        save_pickle(self, path)
+
+    @staticmethod
+    def load(path: str) -> "HashMap":
+        """
+        Reads a hash map written by save(), with the same capacity and every
+        entry and tombstone in the same bucket.  Like pickle itself, this
+        must only be used on trusted files.
+        """
+        m = load_pickle(path)
+        if not isinstance(m, HashMap):
+            raise ValueError(f"{path} does not hold an open addressing HashMap")
+
+        return m
+
+
+def _restore(capacity: int, min_capacity: int, function, options: dict,
+             states, hashes, distances, keys: list, values: list) -> HashMap:
+    """
+    Rebuilds a HashMap pickled by HashMap.__reduce_ex__().
+    """
+    m = HashMap(capacity, function, **options)
+    m._min_capacity = min_capacity
+    states = unflat_array('B', states)
+    hashes = unflat_array('Q', hashes)
+    distances = unflat_array('Q', distances)
+
+    entry_index = live_index = 0
+    for index, state in enumerate(states):
+        if state == EMPTY:
+            continue
+
+        if state == TOMBSTONE:
+            entry = HashEntry(None, None)
+            entry.is_tombstone = True
+            m._tombstones += 1
+        else:
+            entry = HashEntry(keys[live_index], values[live_index], hashes[live_index])
+            live_index += 1
+            m._size += 1
+
+        entry.distance = distances[entry_index]
+        entry_index += 1
+        m._buckets[index] = entry
+        if entry.is_tombstone is False:
+            m._count_distance(entry.distance, 1)
+
+    return m
+
 
 # ------------------- BASIC TESTING ---------------------------------------- #
 
@@ -0,0 +1,445 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Open addressing Hash Map with the same methods as hash_map_oa.HashMap,
+# stored in parallel flat arrays instead of one HashEntry object per bucket: an
+# array('Q') of cached hashes, a bytearray of bucket states, and lists of keys and
+# values.  Collisions are resolved with quadratic probing.
+
+from array import array
+
+from a6_include import (DynamicArray, HashEntry, batch_to_list,
+                        hash_function_1, hash_function_2, hash_keys)
+
+# Bucket states stored in the state bytearray
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Hashes are stored as unsigned 64 bit integers, so every hash is reduced to
+# 64 bits first and that reduced hash is used for both storage and indexing
+HASH_MASK = (1 << 64) - 1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, tombstone_limit: float = 0.25) -> None:
+        """
+        Initialize new HashMap that uses
+        quadratic probing for collision resolution
+
+        Once the number of tombstones passes tombstone_limit times the
+        capacity, the table is rebuilt in place at the same capacity to
+        reclaim them.  A tombstone_limit of None never rebuilds.
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._tombstone_limit = tombstone_limit
+        self._size = 0
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            out += str(i) + ': ' + str(self._entry(i)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def get_tombstones(self) -> int:
+        """
+        Return number of tombstones (removed entries) in the table
+        """
+        return self._tombstones
+
+    # ------------------------------------------------------------------ #
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the storage arrays with empty arrays of the given capacity.
+        """
+        self._hashes = array('Q', bytes(8 * capacity))
+        self._states = bytearray(capacity)
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+    def _entry(self, index: int) -> HashEntry:
+        """
+        Returns a HashEntry holding a copy of the bucket at the given
+        index, or None if the bucket is empty.
+        """
+        if self._states[index] == EMPTY:
+            return None
+
+        entry = HashEntry(self._keys[index], self._values[index], self._hashes[index])
+        entry.is_tombstone = self._states[index] == TOMBSTONE
+        return entry
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        If the given key already exists, the associated
+        value must be replaced with the new value.  If the
+        given key is not in the hash map, a new key/value
+        pair is added.
+
+        When the current load factor is >= 0.5, double
+        the current capacity.
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+
+        self._insert_hashed(key, value, self._hash_function(key) & HASH_MASK)
+
+    def _insert_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Inserts or updates a key whose reduced hash is already known, without
+        checking the load factor.  If the probe sequence wraps around without
+        finding an empty bucket, the table is doubled and the insert retried.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        modulo_value = self._capacity
+        initial_location = hash_value % modulo_value
+        insert_location = initial_location
+
+        # j is the variable to store the quadratic probing
+        j = 0
+        while states[insert_location] != EMPTY:
+
+            # the key is already in the table, update the value (cached hashes are
+            # compared first) and if it was removed, make it valid and update size
+            if hashes[insert_location] == hash_value and keys[insert_location] == key:
+                if states[insert_location] == TOMBSTONE:
+                    states[insert_location] = LIVE
+                    self._size += 1
+                    self._tombstones -= 1
+                self._values[insert_location] = value
+                return
+
+            # the probe sequence has wrapped around, so make room and try again
+            j += 1
+            if j >= modulo_value:
+                self.resize_table(self._capacity * 2)
+                self._insert_hashed(key, value, hash_value)
+                return
+
+            insert_location = (initial_location + j * j) % modulo_value
+
+        # not a duplicate key, so fill the empty bucket
+        states[insert_location] = LIVE
+        hashes[insert_location] = hash_value
+        keys[insert_location] = key
+        self._values[insert_location] = value
+        self._size += 1
+
+    def _find_index(self, key: str, hash_value: int) -> int:
+        """
+        Returns the index of the live bucket holding a key whose reduced
+        hash is already known, or -1 if the key is not in the hash map.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        modulo_value = self._capacity
+        initial_location = hash_value % modulo_value
+        index = initial_location
+
+        # an empty bucket means the key is not in the hash map, tombstones
+        # are skipped over since the key may have been placed past them
+        j = 0
+        while states[index] != EMPTY:
+            if states[index] == LIVE and hashes[index] == hash_value and keys[index] == key:
+                return index
+
+            j += 1
+            if j >= modulo_value:
+                return -1
+            index = (initial_location + j * j) % modulo_value
+
+        return -1
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._states.count(EMPTY)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table.
+        All existing key/value pairs must remain, and all
+        hash table links must be rehashed.
+
+        If new_capacity is less than the current number of
+        elements in the hash map, the method does nothing.
+
+        If new_capacity is valid, make sure it is a prime
+        number.  If not prime, change it to the next highest
+        prime number using _is_prime() and _next_prime().
+        """
+        # verify new capacity at least as big as number of elements
+        if new_capacity < self._size or new_capacity < 1:
+            return
+
+        # check if new capacity is prime, if not set to next prime number
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        # grow the way put() would while re-inserting, so every entry finds an empty bucket
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        old_states, old_hashes = self._states, self._hashes
+        old_keys, old_values = self._keys, self._values
+        self._allocate(new_capacity)
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+        # the keys are known to be unique, so each live entry goes straight
+        # into the first empty bucket of its probe sequence, using its cached hash
+        states, hashes, keys, values = self._states, self._hashes, self._keys, self._values
+        for old_index in range(len(old_states)):
+            if old_states[old_index] != LIVE:
+                continue
+
+            hash_value = old_hashes[old_index]
+            initial_location = hash_value % new_capacity
+            index = initial_location
+            j = 0
+            while states[index] != EMPTY:
+                j += 1
+                index = (initial_location + j * j) % new_capacity
+
+            states[index] = LIVE
+            hashes[index] = hash_value
+            keys[index] = old_keys[old_index]
+            values[index] = old_values[old_index]
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key
+        is not in the hash map, return None.
+        """
+        index = self._find_index(key, self._hash_function(key) & HASH_MASK)
+        if index == -1:
+            return None
+
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map,
+        otherwise return False.  An empty hash map does
+        not contain any keys.
+        """
+        if self._size == 0:
+            return False
+
+        return self._find_index(key, self._hash_function(key) & HASH_MASK) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from
+        the hash map.  If the key is not in the hash map,
+        the method does nothing.
+        """
+        if self._size == 0:
+            return
+
+        index = self._find_index(key, self._hash_function(key) & HASH_MASK)
+        if index != -1:
+            self._remove_index(index)
+
+    def _remove_index(self, index: int) -> None:
+        """
+        Turns the live bucket at the given index into a tombstone, dropping
+        its value.  When there are too many tombstones, the table is rebuilt
+        at the same capacity, which leaves none behind.
+        """
+        self._states[index] = TOMBSTONE
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+        if self._tombstone_limit is not None and self._tombstones > self._tombstone_limit * self._capacity:
+            self.resize_table(self._capacity)
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates the hash map with every (key, value) pair in the given
+        iterable (or DynamicArray).  The table is resized at most once,
+        up front, so that the load factor stays below 0.5 for the whole
+        batch, and each pair is then inserted without further checks.
+        """
+        pairs = batch_to_list(pairs)
+
+        # pre-size for the worst case where every key in the batch is new
+        if self._size + len(pairs) >= self._capacity * 0.5:
+            self.resize_table(2 * (self._size + len(pairs)) + 1)
+
+        # hash the whole batch in one (vectorized, when possible) pass
+        hashes = hash_keys(self._hash_function, [key for key, value in pairs])
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._insert_hashed(key, value, hash_value & HASH_MASK)
+
+    def get_many(self, keys, default: object = None) -> DynamicArray:
+        """
+        Returns a DynamicArray holding the value of every key in the given
+        iterable (or DynamicArray), in input order.  Keys that are not in
+        the hash map get the default value.
+        """
+        keys = batch_to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            index = self._find_index(key, hash_value & HASH_MASK)
+            values.append(default if index == -1 else self._values[index])
+
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in the given iterable (or DynamicArray) from the
+        hash map.  Keys that are not in the hash map are ignored.
+        """
+        keys = batch_to_list(keys)
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            if self._size == 0:
+                return
+
+            index = self._find_index(key, hash_value & HASH_MASK)
+            if index != -1:
+                self._remove_index(index)
+
+    def clear(self) -> None:
+        """
+        Clears the content of the hash map without changing
+        the underlying hash table capacity.
+        """
+        self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a
+        tuple of a key/value pair stored in the hash map.
+        Order does not matter.
+        """
+        key_value_pair = DynamicArray()
+        states, keys, values = self._states, self._keys, self._values
+        for index in range(self._capacity):
+            if states[index] == LIVE:
+                key_value_pair.append((keys[index], values[index]))
+
+        return key_value_pair
+
+    def __iter__(self):
+        """
+        Enables the hash map to iterate across itself.
+        """
+        self._index = 0
+        return self
+
+    def __next__(self):
+        """
+        Returns a HashEntry copy of the next live bucket in the hash map,
+        based upon the current location of the iterator.
+        """
+        # skip over buckets that do not hold a valid key
+        while self._index < self._capacity and self._states[self._index] != LIVE:
+            self._index += 1
+
+        if self._index >= self._capacity:
+            raise StopIteration
+
+        self._index += 1
+        return self._entry(self._index - 1)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - resize example 2")
+    print("----------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 13)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    print(m.get_size(), m.get_capacity())
+
+    for capacity in range(111, 1000, 117):
+        m.resize_table(capacity)
+
+        m.put('some key', 'some value')
+        result = m.contains_key('some key')
+        m.remove('some key')
+
+        for key in keys:
+            # all inserted keys must be present
+            result &= m.contains_key(str(key))
+            # NOT inserted keys must be absent
+            result &= not m.contains_key(str(key + 1))
+        print(capacity, result, m.get_size(), m.get_capacity(), round(m.table_load(), 2))
+
+    print("\nPDF - __iter__(), __next__() example 2")
+    print("---------------------")
+    m = HashMap(10, hash_function_1)
+    for i in range(5):
+        m.put(str(i), str(i * 24))
+    m.remove('0')
+    m.remove('4')
+    for item in m:
+        print('K:', item.key, 'V:', item.value)
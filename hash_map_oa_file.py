@@ -0,0 +1,297 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: On-disk file format for the open addressing Hash Map, and a
+# read-only HashMap that answers get() and contains_key() straight from the
+# memory-mapped file.  write() saves a hash_map_oa.HashMap with every entry in
+# the same bucket it has in the map.  Opening a file only maps it and reads its
+# header, so it takes the same time however many keys the file holds, and the
+# pages holding the buckets are only read from disk when a lookup touches them.
+#
+# File layout (little endian):
+#   header   magic, format version, hash function id, capacity, size, heap size
+#   hashes   capacity 8 byte hashes (reduced to 64 bits)
+#   offsets  capacity 8 byte heap offsets of the records
+#   states   capacity 1 byte bucket states (EMPTY, LIVE or TOMBSTONE), padded to 8
+#   heap     records of key length, value length, UTF-8 key and pickled value
+
+import mmap
+import os
+import pickle
+import struct
+from array import array
+
+import hash_map_oa
+from a6_include import DynamicArray, HashEntry, hash_function_1, hash_function_2
+from hash_map_oa_shared import EMPTY, HASH_FUNCTIONS, HASH_MASK, LIVE, RECORD, TOMBSTONE
+
+# First bytes of every file, and the version of the layout after them
+MAGIC = b'CS261OA\0'
+VERSION = 1
+
+# File header: magic, version, hash function id, capacity, size and heap size
+HEADER = struct.Struct('<8sIIQQQ')
+
+
+def write(table: hash_map_oa.HashMap, path: str) -> None:
+    """
+    Writes the given open addressing HashMap to a file at the given path,
+    keeping every entry (and tombstone) in its bucket so the file's probe
+    sequences are the map's.  The map's hash function must be one of
+    hash_map_oa_shared.HASH_FUNCTIONS, and every value must be picklable.
+    The file is written next to the path and renamed over it, so a reader
+    never sees a half written file.
+    """
+    function_ids = {function: function_id for function_id, function in HASH_FUNCTIONS.items()}
+    if table._hash_function not in function_ids:
+        raise ValueError(f"function must be one of {list(HASH_FUNCTIONS.values())} to be written")
+
+    # finish any incremental resize first, so there is only one table
+    table._finish_resize()
+
+    capacity = table.get_capacity()
+    hashes = array('Q', bytes(8 * capacity))
+    offsets = array('Q', bytes(8 * capacity))
+    states = bytearray((capacity + 7) // 8 * 8)
+    heap = bytearray()
+
+    for index in range(capacity):
+        entry = table._buckets[index]
+        if entry is None:
+            continue
+
+        hashes[index] = entry.hash & HASH_MASK
+        if entry.is_tombstone is True:
+            states[index] = TOMBSTONE
+            continue
+
+        key = entry.key.encode()
+        value = pickle.dumps(entry.value)
+        offsets[index] = len(heap)
+        states[index] = LIVE
+        heap += RECORD.pack(len(key), len(value)) + key + value
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as output:
+        output.write(HEADER.pack(MAGIC, VERSION, function_ids[table._hash_function],
+                                 capacity, table.get_size(), len(heap)))
+        output.write(hashes.tobytes())
+        output.write(offsets.tobytes())
+        output.write(states)
+        output.write(heap)
+    os.replace(temporary_path, path)
+
+
+class HashMap:
+    def __init__(self, path: str) -> None:
+        """
+        Open a file written by write() as a read-only HashMap.
+        Nothing but the header is read until a lookup needs it.
+        Raises ValueError if the file is empty, truncated or not
+        a hash map file, and leaves nothing open if it does.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map_file(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _map_file(self, path: str) -> None:
+        """
+        Maps the open file and checks its header, then sets up
+        views of its hashes, offsets, states and heap.
+        """
+        # an empty file cannot be mapped at all
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            raise ValueError(f"{path} is too short to be a version {VERSION} hash map file")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        try:
+            magic, version, function_id, capacity, size, heap_size = HEADER.unpack_from(buffer, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} hash map file")
+            if function_id not in HASH_FUNCTIONS:
+                raise ValueError(f"{path} uses an unknown hash function id {function_id}")
+
+            # every section the header describes must be in the file
+            length = HEADER.size + 16 * capacity + (capacity + 7) // 8 * 8 + heap_size
+            if len(buffer) < length:
+                raise ValueError(f"{path} is truncated, it has {len(buffer)} of {length} bytes")
+
+            start = HEADER.size
+            self._hashes = buffer[start:start + 8 * capacity].cast('Q')
+            start += 8 * capacity
+            self._offsets = buffer[start:start + 8 * capacity].cast('Q')
+            start += 8 * capacity
+            self._states = buffer[start:start + capacity]
+            start += (capacity + 7) // 8 * 8
+            self._heap = buffer[start:start + heap_size]
+        finally:
+            buffer.release()
+
+        self._hash_function = HASH_FUNCTIONS[function_id]
+        self._capacity = capacity
+        self._size = size
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            entry = None
+            if self._states[i] != EMPTY:
+                entry = self._entry(i)
+                entry.is_tombstone = self._states[i] == TOMBSTONE
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor.
+        """
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._states.tobytes().count(EMPTY)
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: bytes, hash_value: int) -> int:
+        """
+        Returns the bucket of a live key with the given full hash,
+        or -1 if it is not in the hash map.
+        """
+        hashes, offsets, states, heap = self._hashes, self._offsets, self._states, self._heap
+        modulo_value = self._capacity
+
+        # the buckets were chosen with the full hash, exactly as in hash_map_oa
+        initial_location = hash_value % modulo_value
+        hash_value &= HASH_MASK
+
+        # quadratic probing, an empty bucket ends the search and tombstones
+        # are skipped over since the key may have been placed past them
+        j = 0
+        index = initial_location
+        while states[index] != EMPTY:
+            if states[index] == LIVE and hashes[index] == hash_value:
+                offset = offsets[index]
+                key_length = RECORD.unpack_from(heap, offset)[0]
+                start = offset + RECORD.size
+                if heap[start:start + key_length] == key:
+                    return index
+
+            j += 1
+            if j >= modulo_value:
+                return -1
+            index = (initial_location + (j ** 2)) % modulo_value
+
+        return -1
+
+    def _entry(self, index: int) -> HashEntry:
+        """
+        Returns a HashEntry holding the key, value and hash of the given bucket.
+        """
+        offset = self._offsets[index]
+        if self._states[index] == TOMBSTONE:
+            return HashEntry(None, None, self._hashes[index])
+
+        key_length, value_length = RECORD.unpack_from(self._heap, offset)
+        start = offset + RECORD.size
+        key = self._heap[start:start + key_length].tobytes().decode()
+        value = pickle.loads(self._heap[start + key_length:start + key_length + value_length])
+        return HashEntry(key, value, self._hashes[index])
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key
+        is not in the hash map, return None.
+        """
+        index = self._find(key.encode(), self._hash_function(key))
+        if index < 0:
+            return None
+
+        return self._entry(index).value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map,
+        otherwise return False.  An empty hash map does
+        not contain any keys.
+        """
+        if self._size == 0:
+            return False
+
+        return self._find(key.encode(), self._hash_function(key)) >= 0
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a
+        tuple of a key/value pair stored in the hash map.
+        Order does not matter.
+        """
+        key_value_pair = DynamicArray()
+        for entry in self:
+            key_value_pair.append((entry.key, entry.value))
+
+        return key_value_pair
+
+    def __iter__(self):
+        """
+        Yields a HashEntry for every live entry in the hash map.
+        """
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                yield self._entry(index)
+
+    def close(self) -> None:
+        """
+        Unmaps and closes the file.  The map cannot be used after it is closed.
+        """
+        for view in ('_hashes', '_offsets', '_states', '_heap'):
+            if hasattr(self, view):
+                getattr(self, view).release()
+        if hasattr(self, '_mmap'):
+            self._mmap.close()
+        self._file.close()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("\nPDF - get example 1, written to a file and read back")
+    print("-------------------")
+    m = hash_map_oa.HashMap(31, hash_function_1)
+    for i in range(0, 150, 7):
+        m.put(str(i), i * 10)
+    m.remove('0')
+
+    path = os.path.join(tempfile.mkdtemp(), 'map.cs261oa')
+    write(m, path)
+    f = HashMap(path)
+    print(f.get_size(), f.get_capacity(), f.empty_buckets() == m.empty_buckets())
+    for i in range(0, 150, 21):
+        print(i, f.get(str(i)), f.get(str(i)) == m.get(str(i)))
+    f.close()
+    os.remove(path)
@@ -0,0 +1,366 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Open addressing Hash Map for read-mostly use (read-copy-update).
+# Writes go to a private hash_map_oa.HashMap, which is then copied into an
+# immutable Snapshot of its buckets, and the new snapshot is published with a
+# single reference assignment.  Reads only ever look at the published snapshot,
+# so they never take a lock and never wait for a writer, not even one that is
+# in the middle of resize_table().  A write publishes a new snapshot straight
+# away (copy-on-write), or once at the end of a batch() or bulk method.
+
+import threading
+from contextlib import contextmanager
+
+import hash_map_oa
+from a6_include import DynamicArray, HashEntry, batch_to_list, hash_function_1, hash_function_2
+
+
+class Snapshot:
+    """
+    Immutable copy of the buckets of an open addressing HashMap at one
+    point in time.  Each bucket is None (empty) or a tuple of
+    (hash, key, value, probe distance, live), where live is False for a
+    tombstone, laid out exactly as in the map so the same probe sequences
+    find the same keys.
+    """
+
+    def __init__(self, table: hash_map_oa.HashMap) -> None:
+        """
+        Copy the buckets of the given map, which must not
+        have an incremental resize in progress.
+        """
+        buckets = []
+        empty = 0
+        for index in range(table._capacity):
+            entry = table._buckets[index]
+            if entry is None:
+                buckets.append(None)
+                empty += 1
+            else:
+                buckets.append((entry.hash, entry.key, entry.value, entry.distance, not entry.is_tombstone))
+
+        self._buckets = tuple(buckets)
+        self._capacity = table._capacity
+        self._size = table._size
+        self._empty = empty
+        self._hash_function = table._hash_function
+        self._robin_hood = table._probing == 'robin_hood'
+
+    def get_size(self) -> int:
+        """
+        Return size of the snapshot
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of the snapshot
+        """
+        return self._capacity
+
+    def table_load(self) -> float:
+        """
+        Returns the hash table load factor of the snapshot.
+        """
+        return float(self._size / self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the snapshot.
+        """
+        return self._empty
+
+    def _find(self, key: str, hash_value: int) -> tuple:
+        """
+        Returns the live bucket for a key whose full hash is already known,
+        or None if the key is not in the snapshot, probing exactly as
+        hash_map_oa.HashMap does.
+        """
+        buckets, modulo_value = self._buckets, self._capacity
+        initial_location = hash_value % modulo_value
+        probe = buckets[initial_location]
+
+        j = 0
+        while probe is not None:
+            if self._robin_hood and probe[3] < j:
+                return None
+
+            if probe[0] == hash_value and probe[1] == key and probe[4] is True:
+                return probe
+
+            j += 1
+            if j >= modulo_value:
+                return None
+            probe = buckets[(initial_location + (j ** 2)) % modulo_value]
+
+        return None
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key
+        is not in the snapshot, return None.
+        """
+        probe = self._find(key, self._hash_function(key))
+        if probe is None:
+            return None
+
+        return probe[2]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the snapshot, otherwise return False.
+        """
+        if self._size == 0:
+            return False
+
+        return self._find(key, self._hash_function(key)) is not None
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple
+        of a key/value pair stored in the snapshot.
+        """
+        key_value_pair = DynamicArray()
+        for probe in self._buckets:
+            if probe is not None and probe[4] is True:
+                key_value_pair.append((probe[1], probe[2]))
+
+        return key_value_pair
+
+    def __iter__(self):
+        """
+        Yields a HashEntry copy of every live entry in the snapshot.
+        """
+        for probe in self._buckets:
+            if probe is not None and probe[4] is True:
+                yield HashEntry(probe[1], probe[2], probe[0])
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, probing: str = 'quadratic',
+                 tombstone_limit: float = 0.25, max_load: float = 0.5,
+                 growth_factor: float = 2, shrink_load: float = None) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution, with the same options as hash_map_oa.HashMap except
+        incremental resizing, which readers of a snapshot never wait for.
+        """
+        # the map every write goes to, only used while holding the write lock
+        self._writer = hash_map_oa.HashMap(capacity, function, probing, tombstone_limit,
+                                           max_load=max_load, growth_factor=growth_factor,
+                                           shrink_load=shrink_load)
+
+        # writers take turns, and a thread inside batch() can keep writing
+        self._write_lock = threading.RLock()
+        self._batch_depth = 0
+
+        # the snapshot every read goes to
+        self._snapshot = Snapshot(self._writer)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i, probe in enumerate(self._snapshot._buckets):
+            entry = None
+            if probe is not None:
+                entry = HashEntry(probe[1], probe[2], probe[0])
+                entry.is_tombstone = not probe[4]
+            out += str(i) + ': ' + str(entry) + '\n'
+        return out
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns the published snapshot.  It never changes, and stays
+        usable however the map is written to after this call.
+        """
+        return self._snapshot
+
+    def _publish(self) -> None:
+        """
+        Publishes a snapshot of the writer map, unless a batch is still
+        open.  Must be called while holding the write lock.
+        """
+        if self._batch_depth == 0:
+            self._snapshot = Snapshot(self._writer)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups the writes made in the body of a with statement, so one
+        snapshot is published at the end instead of one per write.  Readers
+        see none of the batch's writes until all of them are published.
+        Batches can be nested, and other threads' writes wait for the batch.
+        """
+        with self._write_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                self._publish()
+
+    # ------------------------------------------------------------------ #
+    # reads, from the published snapshot without locking
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._snapshot.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._snapshot.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._snapshot.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._snapshot.empty_buckets()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key
+        is not in the hash map, return None.
+        """
+        return self._snapshot.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map,
+        otherwise return False.
+        """
+        return self._snapshot.contains_key(key)
+
+    def get_many(self, keys, default: object = None) -> DynamicArray:
+        """
+        Returns a DynamicArray holding the value of every key in the given
+        iterable (or DynamicArray), in input order, all read from the same
+        snapshot.  Keys that are not in the hash map get the default value.
+        """
+        snapshot = self._snapshot
+        values = DynamicArray()
+        for key in batch_to_list(keys):
+            probe = snapshot._find(key, snapshot._hash_function(key))
+            values.append(default if probe is None else probe[2])
+
+        return values
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a
+        tuple of a key/value pair stored in the hash map.
+        """
+        return self._snapshot.get_keys_and_values()
+
+    def __iter__(self):
+        """
+        Yields a HashEntry copy of every entry in the hash map.
+        """
+        return iter(self._snapshot)
+
+    # ------------------------------------------------------------------ #
+    # writes, to the writer map and then published
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        """
+        with self._write_lock:
+            self._writer.put(key, value)
+            self._publish()
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from
+        the hash map.  If the key is not in the hash map,
+        the method does nothing.
+        """
+        with self._write_lock:
+            self._writer.remove(key)
+            self._publish()
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates the hash map with every (key, value) pair in the given
+        iterable (or DynamicArray), publishing one snapshot at the end.
+        """
+        with self._write_lock:
+            self._writer.put_many(pairs)
+            self._publish()
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in the given iterable (or DynamicArray) from
+        the hash map, publishing one snapshot at the end.
+        """
+        with self._write_lock:
+            self._writer.remove_many(keys)
+            self._publish()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the internal hash table, see
+        hash_map_oa.HashMap.resize_table().
+        """
+        with self._write_lock:
+            self._writer.resize_table(new_capacity)
+            self._publish()
+
+    def shrink_to_fit(self) -> None:
+        """
+        Resizes the hash table to the smallest prime capacity
+        that holds the current keys below max_load.
+        """
+        with self._write_lock:
+            self._writer.shrink_to_fit()
+            self._publish()
+
+    def clear(self) -> None:
+        """
+        Clears the content of the hash map without changing
+        the underlying hash table capacity.
+        """
+        with self._write_lock:
+            self._writer.clear()
+            self._publish()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - get example 1")
+    print("-------------------")
+    m = HashMap(31, hash_function_1)
+    for i in range(0, 150, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(0, 150, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+
+    print("\nsnapshot - unchanged by later writes")
+    print("-------------------")
+    m = HashMap(11, hash_function_2)
+    m.put_many((str(i), i) for i in range(10))
+    snapshot = m.snapshot()
+    with m.batch():
+        for i in range(10):
+            m.remove(str(i))
+        m.put('new', 'value')
+        print(m.get_size(), m.get('new'))
+    print(snapshot.get_size(), snapshot.get('5'), snapshot.get('new'))
+    print(m.get_size(), m.get('5'), m.get('new'))
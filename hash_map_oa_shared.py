@@ -0,0 +1,594 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Open addressing Hash Map that lives in shared memory, so many
+# processes can read one copy of it.  The table is a multiprocessing.shared_memory
+# segment holding flat slot arrays (hashes, heap offsets and states) and a heap
+# of key/value records, with quadratic probing over a prime capacity like
+# hash_map_oa.HashMap.  A small root segment holds a write sequence number and
+# the generation of the current table segment.  One process at a time writes,
+# bumping the sequence number to odd before a change and back to even after it,
+# and readers retry any lookup that overlapped a write (a seqlock).  Resizing
+# builds the next generation's segment on the side and switches the root to it,
+# and readers follow the switch on their next call.
+
+import pickle
+import struct
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+from a6_include import DynamicArray, fnv1a_hash, hash_function_1, hash_function_2, siphash_hash
+
+# Bucket states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# Hashes are stored as unsigned 64 bit integers, so every hash is reduced to
+# 64 bits first and that reduced hash is used for both storage and indexing
+HASH_MASK = (1 << 64) - 1
+
+# Hash functions a shared map can use, by the id that is stored in the root
+# segment so every process hashes keys the same way.  builtin_hash is left
+# out, since the built-in hash() of a string changes from process to process
+HASH_FUNCTIONS = {1: hash_function_1, 2: hash_function_2, 3: fnv1a_hash, 4: siphash_hash}
+
+# Root segment: write sequence number (odd while a write is in progress),
+# generation of the current table segment and hash function id
+ROOT = struct.Struct('<QQQ')
+
+# Table segment header: capacity, size, tombstones, heap size and heap bytes
+# used.  It is followed by the hashes (8 bytes per bucket), the heap offsets
+# of the records (8 bytes per bucket), the states (1 byte per bucket, padded
+# to a multiple of 8) and the heap
+TABLE_HEADER = struct.Struct('<QQQQQ')
+
+# Heap record header: length of the UTF-8 key and of the pickled value,
+# followed by the key and value bytes
+RECORD = struct.Struct('<II')
+
+# Smallest heap a table segment is created with, in bytes
+MIN_HEAP_SIZE = 4096
+
+
+@contextmanager
+def _untracked():
+    """
+    Keeps the resource tracker from hearing about the shared memory segments
+    opened, created or unlinked in the body of a with statement.  Before
+    Python 3.13 every segment is tracked, and the tracker unlinks them when
+    the process exits, but a map outlives the processes that use it.
+    """
+    register, unregister = resource_tracker.register, resource_tracker.unregister
+    resource_tracker.register = resource_tracker.unregister = lambda name, rtype: None
+    try:
+        yield
+    finally:
+        resource_tracker.register, resource_tracker.unregister = register, unregister
+
+
+def _segment(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Creates or attaches to a shared memory segment that is not tracked,
+    so it is only freed by unlinking it.
+    """
+    try:
+        return shared_memory.SharedMemory(name, create, size, track=False)
+    except TypeError:
+        with _untracked():
+            return shared_memory.SharedMemory(name, create, size)
+
+
+def _unlink(segment: shared_memory.SharedMemory) -> None:
+    """
+    Unlinks a segment opened with _segment().
+    """
+    with _untracked():
+        segment.unlink()
+
+
+class HashMap:
+    def __init__(self, capacity: int = 11, function=hash_function_1, name: str = None,
+                 create: bool = True, max_load: float = 0.5, tombstone_limit: float = 0.25,
+                 heap_size: int = MIN_HEAP_SIZE) -> None:
+        """
+        Create a new shared HashMap that uses quadratic probing for
+        collision resolution, or with create=False, attach to the existing
+        one with the given name (its capacity and hash function are then
+        read from shared memory).  The function must be one of
+        HASH_FUNCTIONS, so that other processes can use it too.
+
+        Any process may write, but only one at a time.  The process that
+        created the map should unlink() it when every process is done,
+        the table segments are not freed when processes exit.
+        """
+        self._max_load = max_load
+        self._tombstone_limit = tombstone_limit
+        self._table = None
+        self._generation = None
+
+        if create is True:
+            function_ids = {function: function_id for function_id, function in HASH_FUNCTIONS.items()}
+            if function not in function_ids:
+                raise ValueError(f"function must be one of {list(HASH_FUNCTIONS.values())} to be shared")
+
+            self._root = shared_memory.SharedMemory(name, create=True, size=ROOT.size)
+            ROOT.pack_into(self._root.buf, 0, 0, 0, function_ids[function])
+            self._hash_function = function
+            self._rebuild(capacity, heap_size)
+        else:
+            self._root = _segment(name)
+            self._hash_function = HASH_FUNCTIONS[ROOT.unpack_from(self._root.buf, 0)[2]]
+            self._read(lambda: None)
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_name(self) -> str:
+        """
+        Return the name other processes attach to the map with
+        """
+        return self._root.name
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._read(lambda: self._header()[1])
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._read(lambda: self._capacity)
+
+    # ------------------------------------------------------------------ #
+    # shared memory layout and the seqlock
+
+    def _header(self) -> tuple:
+        """
+        Returns (capacity, size, tombstones, heap size, heap bytes used)
+        of the current table segment.
+        """
+        return TABLE_HEADER.unpack_from(self._table.buf, 0)
+
+    def _sequence(self) -> int:
+        """
+        Returns the write sequence number, which is odd during a write.
+        """
+        return ROOT.unpack_from(self._root.buf, 0)[0]
+
+    def _set_root(self, sequence: int, generation: int) -> None:
+        """
+        Writes the sequence number and generation to the root segment.
+        """
+        function_id = ROOT.unpack_from(self._root.buf, 0)[2]
+        ROOT.pack_into(self._root.buf, 0, sequence, generation, function_id)
+
+    def _attach(self, segment: shared_memory.SharedMemory, generation: int) -> None:
+        """
+        Makes the given table segment the current one, mapping its slot
+        arrays and heap as views, and closes the previous one.
+        """
+        capacity, size, tombstones, heap_size, heap_used = TABLE_HEADER.unpack_from(segment.buf, 0)
+        start = TABLE_HEADER.size
+        hashes = segment.buf[start:start + 8 * capacity].cast('Q')
+        start += 8 * capacity
+        offsets = segment.buf[start:start + 8 * capacity].cast('Q')
+        start += 8 * capacity
+        states = segment.buf[start:start + capacity]
+        start += (capacity + 7) // 8 * 8
+        heap = segment.buf[start:start + heap_size]
+
+        self._detach()
+        self._table, self._generation = segment, generation
+        self._hashes, self._offsets, self._states, self._heap = hashes, offsets, states, heap
+        self._capacity = capacity
+
+    def _detach(self) -> None:
+        """
+        Releases the views of the current table segment and closes it.
+        """
+        if self._table is not None:
+            for view in (self._hashes, self._offsets, self._states, self._heap):
+                view.release()
+            self._table.close()
+            self._table = None
+
+    def _read(self, read):
+        """
+        Returns the result of calling read() against a consistent table.
+        The call is retried while a write is in progress, and whenever a
+        write happened during it, after following any switch to a new
+        table segment.  read() must not keep views of shared memory.
+        """
+        while True:
+            sequence, generation, function_id = ROOT.unpack_from(self._root.buf, 0)
+            if sequence % 2 == 1:
+                time.sleep(0)
+                continue
+
+            if generation != self._generation:
+                try:
+                    self._attach(_segment(f"{self._root.name}.{generation}"), generation)
+                except FileNotFoundError:
+                    # the writer has already moved on past this generation
+                    continue
+
+            # a write in between can leave the read looking at a half
+            # updated table, which is only an error if nothing was written
+            try:
+                result = read()
+            except (struct.error, IndexError, ValueError, UnicodeDecodeError):
+                if self._sequence() == sequence:
+                    raise
+                continue
+
+            if self._sequence() == sequence:
+                return result
+
+    def _begin_write(self) -> None:
+        """
+        Marks the start of a change to the current table.
+        """
+        self._set_root(self._sequence() + 1, self._generation)
+
+    def _end_write(self) -> None:
+        """
+        Marks the end of a change to the current table.
+        """
+        self._set_root(self._sequence() + 1, self._generation)
+
+    def _find(self, key: bytes, hash_value: int) -> int:
+        """
+        Returns the bucket of a live key whose reduced hash is
+        already known, or -1 if it is not in the hash map.
+        """
+        hashes, offsets, states, heap = self._hashes, self._offsets, self._states, self._heap
+        modulo_value = self._capacity
+        initial_location = hash_value % modulo_value
+
+        # quadratic probing, an empty bucket ends the search and tombstones
+        # are skipped over since the key may have been placed past them
+        j = 0
+        index = initial_location
+        while states[index] != EMPTY:
+            if states[index] == LIVE and hashes[index] == hash_value:
+                offset = offsets[index]
+                key_length = RECORD.unpack_from(heap, offset)[0]
+                start = offset + RECORD.size
+                if heap[start:start + key_length] == key:
+                    return index
+
+            j += 1
+            if j >= modulo_value:
+                return -1
+            index = (initial_location + (j ** 2)) % modulo_value
+
+        return -1
+
+    def _value_bytes(self, index: int) -> bytes:
+        """
+        Returns a copy of the pickled value of the record in the given bucket.
+        """
+        offset = self._offsets[index]
+        key_length, value_length = RECORD.unpack_from(self._heap, offset)
+        start = offset + RECORD.size + key_length
+        return bytes(self._heap[start:start + value_length])
+
+    def _records(self) -> list:
+        """
+        Returns a (hash, record bytes) pair for every live bucket.
+        """
+        records = []
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                offset = self._offsets[index]
+                key_length, value_length = RECORD.unpack_from(self._heap, offset)
+                end = offset + RECORD.size + key_length + value_length
+                records.append((self._hashes[index], bytes(self._heap[offset:end])))
+        return records
+
+    def _rebuild(self, new_capacity: int, heap_size: int) -> None:
+        """
+        Writes every live record into the table segment of the next generation,
+        with the given capacity (rounded up to a prime that keeps the load
+        factor below max_load) and a heap with at least heap_size bytes and
+        room to spare, then switches every process over to it.  Readers keep
+        using the old segment until the switch, so no seqlock is needed while
+        the new one is filled.
+        """
+        records = self._records() if self._table is not None else []
+
+        if self._is_prime(new_capacity) is False:
+            new_capacity = self._next_prime(new_capacity)
+        while len(records) / new_capacity >= self._max_load:
+            new_capacity = self._next_prime(new_capacity * 2)
+
+        heap_used = sum(len(record) for hash_value, record in records)
+        heap_size = max(heap_size, 2 * heap_used, MIN_HEAP_SIZE)
+
+        generation = 0 if self._generation is None else self._generation + 1
+        size = TABLE_HEADER.size + 16 * new_capacity + (new_capacity + 7) // 8 * 8 + heap_size
+        segment = _segment(f"{self._root.name}.{generation}", create=True, size=size)
+        TABLE_HEADER.pack_into(segment.buf, 0, new_capacity, len(records), 0, heap_size, heap_used)
+
+        # map the new segment, keeping the old one open until the switch
+        old_table = self._table
+        old_views = None if old_table is None else (self._hashes, self._offsets, self._states, self._heap)
+        self._table = None
+        self._attach(segment, generation)
+
+        # place the records, a new segment is all zeros, so every bucket is EMPTY
+        offset = 0
+        for hash_value, record in records:
+            initial_location = hash_value % new_capacity
+            index, j = initial_location, 0
+            while self._states[index] != EMPTY:
+                j += 1
+                index = (initial_location + (j ** 2)) % new_capacity
+            self._hashes[index] = hash_value
+            self._offsets[index] = offset
+            self._states[index] = LIVE
+            self._heap[offset:offset + len(record)] = record
+            offset += len(record)
+
+        # switch every process to the new generation, then drop the old one
+        self._set_root(self._sequence() + 2, generation)
+        if old_table is not None:
+            for view in old_views:
+                view.release()
+            old_table.close()
+            _unlink(old_table)
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map.
+        If the given key already exists, the associated
+        value must be replaced with the new value.  If the
+        given key is not in the hash map, a new key/value
+        pair is added.  The value must be picklable.
+
+        When the current load factor is >= max_load, double
+        the current capacity.
+        """
+        key_bytes = key.encode()
+        hash_value = self._hash_function(key) & HASH_MASK
+        value_bytes = pickle.dumps(value)
+        record = RECORD.pack(len(key_bytes), len(value_bytes)) + key_bytes + value_bytes
+
+        # this is the only writer, so the table cannot change under it
+        self._read(lambda: None)
+        capacity, size, tombstones, heap_size, heap_used = self._header()
+        if size / capacity >= self._max_load:
+            self._rebuild(capacity * 2, heap_size)
+        elif heap_used + len(record) > heap_size:
+            self._rebuild(capacity, 2 * (heap_size + len(record)))
+        capacity, size, tombstones, heap_size, heap_used = self._header()
+
+        # find the key, or else the first empty bucket or tombstone to put it in
+        index = self._find(key_bytes, hash_value)
+        is_new = index < 0
+        if is_new:
+            initial_location = hash_value % capacity
+            index, j = initial_location, 0
+            while self._states[index] == LIVE:
+                j += 1
+                if j >= capacity:
+                    # the probe sequence has wrapped around, so make room and try again
+                    self._rebuild(capacity * 2, heap_size)
+                    self.put(key, value)
+                    return
+                index = (initial_location + (j ** 2)) % capacity
+
+        # the record goes in the unused end of the heap, which readers
+        # never look at, so it can be written before the seqlock is taken
+        self._heap[heap_used:heap_used + len(record)] = record
+
+        self._begin_write()
+        self._offsets[index] = heap_used
+        if is_new:
+            if self._states[index] == TOMBSTONE:
+                tombstones -= 1
+            self._hashes[index] = hash_value
+            self._states[index] = LIVE
+            size += 1
+        TABLE_HEADER.pack_into(self._table.buf, 0, capacity, size, tombstones, heap_size, heap_used + len(record))
+        self._end_write()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key
+        is not in the hash map, return None.
+        """
+        key_bytes = key.encode()
+        hash_value = self._hash_function(key) & HASH_MASK
+
+        def read():
+            index = self._find(key_bytes, hash_value)
+            return None if index < 0 else self._value_bytes(index)
+
+        value_bytes = self._read(read)
+        if value_bytes is None:
+            return None
+
+        return pickle.loads(value_bytes)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map,
+        otherwise return False.  An empty hash map does
+        not contain any keys.
+        """
+        key_bytes = key.encode()
+        hash_value = self._hash_function(key) & HASH_MASK
+        return self._read(lambda: self._find(key_bytes, hash_value) >= 0)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from
+        the hash map.  If the key is not in the hash map,
+        the method does nothing.
+        """
+        key_bytes = key.encode()
+        hash_value = self._hash_function(key) & HASH_MASK
+        index = self._read(lambda: self._find(key_bytes, hash_value))
+        if index < 0:
+            return
+
+        capacity, size, tombstones, heap_size, heap_used = self._header()
+        self._begin_write()
+        self._states[index] = TOMBSTONE
+        TABLE_HEADER.pack_into(self._table.buf, 0, capacity, size - 1, tombstones + 1, heap_size, heap_used)
+        self._end_write()
+
+        # too many tombstones, rebuild at the same capacity to reclaim them
+        if self._tombstone_limit is not None and tombstones + 1 > self._tombstone_limit * capacity:
+            self._rebuild(capacity, heap_size)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        capacity, size = self._read(lambda: self._header()[:2])
+        return float(size / capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._read(lambda: self._states.tobytes().count(EMPTY))
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table.  If new_capacity is
+        less than the current number of elements in the hash map, the
+        method does nothing.  Otherwise the capacity is rounded up to a
+        prime number, and the records are moved into a new segment.
+        """
+        self._read(lambda: None)
+        capacity, size, tombstones, heap_size, heap_used = self._header()
+        if new_capacity < size or new_capacity < 1:
+            return
+
+        self._rebuild(new_capacity, heap_size)
+
+    def clear(self) -> None:
+        """
+        Clears the content of the hash map without changing
+        the underlying hash table capacity.
+        """
+        self._read(lambda: None)
+        capacity, size, tombstones, heap_size, heap_used = self._header()
+        self._begin_write()
+        self._states[:] = bytes(capacity)
+        TABLE_HEADER.pack_into(self._table.buf, 0, capacity, 0, 0, heap_size, 0)
+        self._end_write()
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a
+        tuple of a key/value pair stored in the hash map.
+        Order does not matter.
+        """
+        key_value_pair = DynamicArray()
+        for hash_value, record in self._read(self._records):
+            key_length, value_length = RECORD.unpack_from(record, 0)
+            key = record[RECORD.size:RECORD.size + key_length].decode()
+            key_value_pair.append((key, pickle.loads(record[RECORD.size + key_length:])))
+
+        return key_value_pair
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory.  The map
+        cannot be used by this process after it is closed.
+        """
+        self._detach()
+        self._root.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory of the map once every process has closed it.
+        """
+        # after close(), the last generation this process saw is the current one
+        # unless another process has resized the map since
+        generation = self._generation
+        if self._root.buf is not None:
+            generation = ROOT.unpack_from(self._root.buf, 0)[1]
+
+        table = _segment(f"{self._root.name}.{generation}")
+        table.close()
+        _unlink(table)
+        self._root.unlink()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+def _reader(name: str, keys: list, results) -> None:
+    """
+    Attaches to the shared map with the given name in another
+    process and sends back the values of the given keys.
+    """
+    m = HashMap(name=name, create=False)
+    results.put([m.get(key) for key in keys])
+    m.close()
+
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    print("\nPDF - get example 1")
+    print("-------------------")
+    m = HashMap(31, hash_function_1)
+    for i in range(0, 150, 7):
+        m.put(str(i), i * 10)
+    print(m.get_size(), m.get_capacity())
+    for i in range(0, 150, 21):
+        print(i, m.get(str(i)), m.get(str(i)) == i * 10)
+
+    print("\nread from another process")
+    print("-------------------")
+    m.remove('0')
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_reader, args=(m.get_name(), ['0', '7', '147'], queue))
+    process.start()
+    print(queue.get())
+    process.join()
+    print("Expected result is: [None, 70, 1470]")
+
+    m.close()
+    m.unlink()
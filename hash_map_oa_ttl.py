@@ -0,0 +1,317 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Open addressing Hash Map whose entries can expire.  Each put()
+# can give the entry a time to live (or use the map's default), and an expired
+# entry is absent for get() and contains_key() from that moment.  Expired
+# entries are reclaimed lazily when a lookup finds one, and by tick(), which
+# pops at most a given number of deadlines off an expiry heap.  Deadlines left
+# stale by a later put() or remove() are compacted out of the heap a bounded
+# number at a time as well, so a tick never scans the table or the whole heap.
+# Every write also runs a small tick, so a map that is written to keeps
+# reclaiming without being asked.
+
+import heapq
+import time
+
+import hash_map_oa
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+# Default number of deadlines each write pops off the expiry heap
+SWEEP_STEP = 2
+
+# Default number of deadlines tick() pops off the expiry heap
+TICK_LIMIT = 1000
+
+# ttl of an entry that never expires, whatever the map's default_ttl
+FOREVER = float('inf')
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, default_ttl: float = None,
+                 clock: callable = time.monotonic, sweep_step: int = SWEEP_STEP, **options) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution, where entries put without a ttl live for default_ttl
+        seconds of the given clock (or forever if it is None).  Any other
+        keyword options are those of hash_map_oa.HashMap.
+        """
+        if default_ttl is not None and default_ttl <= 0:
+            raise ValueError(f"default_ttl must be greater than 0, not {default_ttl!r}")
+        if sweep_step < 0:
+            raise ValueError(f"sweep_step must be at least 0, not {sweep_step!r}")
+
+        # every value is stored in the map as a (value, deadline) tuple,
+        # where deadline is None for an entry that never expires
+        self._map = hash_map_oa.HashMap(capacity, function, **options)
+        self._default_ttl = default_ttl
+        self._clock = clock
+        self._sweep_step = sweep_step
+
+        # min-heap of (deadline, key) for every entry with a deadline.  When
+        # a key is put again or removed its old deadline stays in the heap,
+        # and is dropped when it is popped.  Once the heap holds more than
+        # twice as many deadlines as the map has keys it is set aside as
+        # _draining, and each tick moves the next few of its deadlines that
+        # are still live into a new heap, from _drain_index on
+        self._expiry = []
+        self._draining = []
+        self._drain_index = 0
+        self._expired = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map, which includes expired entries
+        that have not been reclaimed yet
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._map.empty_buckets()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Updates the key/value pair in the hash map.  The entry expires ttl
+        seconds from now, or default_ttl seconds if ttl is not given, or
+        never if ttl is FOREVER (or both are None).  Putting a key again
+        resets its deadline.
+        """
+        if ttl is None:
+            ttl = self._default_ttl
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be greater than 0, not {ttl!r}")
+
+        deadline = None if ttl is None or ttl == FOREVER else self._clock() + ttl
+        self._map.put(key, (value, deadline))
+        if deadline is not None:
+            heapq.heappush(self._expiry, (deadline, key))
+
+        self.tick(self._sweep_step)
+
+    def _live(self, key: str) -> tuple:
+        """
+        Returns the (value, deadline) tuple of the given key, or None if it
+        is not in the hash map or has expired, reclaiming it if it has.
+        """
+        stored = self._map.get(key)
+        if stored is None:
+            return None
+
+        if stored[1] is not None and stored[1] <= self._clock():
+            self._map.remove(key)
+            self._expired += 1
+            return None
+
+        return stored
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a given key.  If a key is
+        not in the hash map, or has expired, return None.
+        """
+        stored = self._live(key)
+        if stored is None:
+            return None
+
+        return stored[0]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map and has not
+        expired, otherwise return False.
+        """
+        return self._live(key) is not None
+
+    def ttl(self, key: str) -> float:
+        """
+        Returns the number of seconds until the given key expires, or None
+        if it never expires.  Raises KeyError if the key is not in the hash
+        map or has expired.
+        """
+        stored = self._live(key)
+        if stored is None:
+            raise KeyError(key)
+
+        return None if stored[1] is None else stored[1] - self._clock()
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value from
+        the hash map.  If the key is not in the hash map,
+        the method does nothing.
+        """
+        self._map.remove(key)
+        self.tick(self._sweep_step)
+
+    def tick(self, limit: int = TICK_LIMIT) -> int:
+        """
+        Reclaims expired entries, popping at most limit deadlines off the
+        expiry heap (and moving at most limit more out of a heap being
+        compacted), and returns the number of entries reclaimed.  The work
+        is bounded by limit however many entries have expired, so calling
+        this regularly (from a timer, or between requests) frees memory in
+        small steps.
+        """
+        now = self._clock()
+        reclaimed = self._drain(limit, now)
+        expiry = self._expiry
+        for _ in range(limit):
+            if not expiry or expiry[0][0] > now:
+                break
+
+            deadline, key = heapq.heappop(expiry)
+
+            # the deadline is stale if the key was put again or removed since
+            stored = self._map.get(key)
+            if stored is not None and stored[1] == deadline:
+                self._map.remove(key)
+                reclaimed += 1
+
+        self._expired += reclaimed
+        if not self._draining and len(expiry) > 2 * self._map.get_size() + limit:
+            # start compacting, later ticks drain the old heap into a new one
+            self._draining, self._drain_index = expiry, 0
+            self._expiry = []
+
+        return reclaimed
+
+    def _drain(self, limit: int, now: float) -> int:
+        """
+        Moves at most limit deadlines of the heap being compacted into the
+        expiry heap, dropping stale ones and reclaiming the entries of those
+        that have passed.  Returns the number of entries reclaimed.
+        """
+        draining = self._draining
+        stop = min(self._drain_index + limit, len(draining))
+        reclaimed = 0
+        for index in range(self._drain_index, stop):
+            deadline, key = draining[index]
+            stored = self._map.get(key)
+            if stored is None or stored[1] != deadline:
+                continue
+
+            if deadline <= now:
+                self._map.remove(key)
+                reclaimed += 1
+            else:
+                heapq.heappush(self._expiry, (deadline, key))
+
+        if stop == len(draining):
+            self._draining, self._drain_index = [], 0
+        else:
+            self._drain_index = stop
+
+        return reclaimed
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a dynamic array where each index contains a tuple of a
+        key/value pair stored in the hash map that has not expired.
+        """
+        now = self._clock()
+        key_value_pair = DynamicArray()
+        for entry in self._map:
+            value, deadline = entry.value
+            if deadline is None or deadline > now:
+                key_value_pair.append((entry.key, value))
+
+        return key_value_pair
+
+    def clear(self) -> None:
+        """
+        Clears the content of the hash map without changing
+        the underlying hash table capacity.
+        """
+        self._map.clear()
+        self._expiry = []
+        self._draining, self._drain_index = [], 0
+
+    def stats(self) -> dict:
+        """
+        Returns the stats() of the underlying hash_map_oa.HashMap, with:
+
+        pending_deadlines   deadlines in the expiry heap, including stale ones
+        expired             expired entries reclaimed so far, lazily or by tick()
+        """
+        stats = self._map.stats()
+        stats['pending_deadlines'] = len(self._expiry) + len(self._draining) - self._drain_index
+        stats['expired'] = self._expired
+        return stats
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    class Clock:
+        """Clock that only moves when told to."""
+        def __init__(self) -> None:
+            self.now = 0.0
+
+        def __call__(self) -> float:
+            return self.now
+
+    print("\nTTL - lazy expiry")
+    print("-------------------")
+    clock = Clock()
+    m = HashMap(11, hash_function_1, default_ttl=10, clock=clock)
+    m.put('session', 'alice')
+    m.put('forever', 'bob', ttl=FOREVER)
+    m.put('short', 'carol', ttl=1)
+    clock.now = 5
+    print(m.get('session'), m.get('forever'), m.get('short'), m.ttl('session'))
+    print("Expected result is: alice bob None 5")
+
+    print("\nTTL - tick reclaims at most 100 entries at a time")
+    print("-------------------")
+    clock = Clock()
+    m = HashMap(11, hash_function_2, default_ttl=60, clock=clock, sweep_step=0)
+    for i in range(250):
+        m.put(str(i), i)
+    clock.now = 61
+    while m.get_size() > 0:
+        print(m.tick(100), m.get_size())
+
+    print("\nTTL - a reclaimed value is freed by the tick that reclaims it")
+    print("-------------------")
+    import weakref
+
+    class Payload:
+        """Value that can be watched with a weak reference."""
+
+    clock = Clock()
+    m = HashMap(101, hash_function_2, default_ttl=1, clock=clock, sweep_step=0)
+    refs = []
+    for i in range(20):
+        payload = Payload()
+        refs.append(weakref.ref(payload))
+        m.put(str(i), payload)
+    del payload
+    clock.now = 2
+    print(m.tick(), m.get_size(), sum(ref() is not None for ref in refs))
+    print("Expected result is: 20 0 0")
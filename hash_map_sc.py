@@ -5,22 +5,53 @@
 # Due Date: 12/2/2022
 # Description: Implement a chaining Hash Map with the following methods: put(),
 # empty_buckets(), table_load(), clear(), resize_table(), get(), contains_key(),
-# remove(), get_keys_and_values(), and find_mode().
+# remove(), get_keys_and_values(), and find_mode(), plus the bulk methods
+# put_many(), get_many() and remove_many(), stats() and shrink_to_fit().
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import math
+from array import array
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
+                        batch_to_list, flat_buffer, flat_hashes, hash_function_1, hash_function_2,
+                        hash_keys, load_pickle, save_pickle, unflat_array)
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 incremental: bool = False,
+                 migration_step: int = 8,
+                 max_load: float = 1.0,
+                 growth_factor: float = 2,
+                 shrink_load: float = None) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+
+        The table grows by growth_factor (rounded up to a prime) once the load
+        factor reaches max_load.  With a shrink_load, removing keys until the
+        load factor falls below it shrinks the table so the load factor is back
+        halfway between shrink_load and max_load, down to no less than the
+        starting capacity, and clear() goes back to the starting capacity.
+        shrink_load must be less than max_load / growth_factor, so that
+        neither a grow nor a shrink leaves the table ready to resize again.
+
+        With incremental=True, growing the table no longer moves every node
+        in one call.  The new table is allocated, and the nodes are then moved
+        into it, a few (migration_step) buckets at a time on every put(),
+        get(), contains_key() and remove(), with lookups checking both tables
+        until the move is done.
         """
+        if max_load <= 0:
+            raise ValueError(f"max_load must be greater than 0, not {max_load!r}")
+        if growth_factor <= 1:
+            raise ValueError(f"growth_factor must be greater than 1, not {growth_factor!r}")
+        if shrink_load is not None and not 0 <= shrink_load < max_load / growth_factor:
+            raise ValueError(f"shrink_load must be at least 0 and less than max_load / growth_factor, "
+                             f"not {shrink_load!r}")
+
         self._buckets = DynamicArray()
 
         # capacity must be a prime number
@@ -31,6 +62,26 @@ class HashMap:
         self._hash_function = function
         self._size = 0
 
+        # resize policy, the table never shrinks below its starting capacity
+        self._max_load = max_load
+        self._growth_factor = growth_factor
+        self._shrink_load = shrink_load
+        self._min_capacity = self._capacity
+
+        # histogram of the chain lengths of the table, chain_counts[length] is the
+        # number of buckets whose chain has that length, kept up to date on every
+        # insert and remove so stats() and empty_buckets() never scan the table
+        self._chain_counts = [self._capacity]
+
+        # state of an incremental resize, the new table while it is being
+        # allocated and the old table while its nodes are being moved
+        self._incremental = incremental
+        self._migration_step = migration_step
+        self._new_buckets = None
+        self._new_capacity = 0
+        self._old_buckets = None
+        self._old_capacity = 0
+
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
@@ -95,62 +146,39 @@ class HashMap:
         Pass in a key:value pair, where the key is a string.  If the existing key already exists,
         update the associated value with the new value.  If the key doesn't exist, add the new
         key:value pair into the hash table.  The table must be resized to double the current
-        capacity when the method is called and the load factor is greater or equal to 1.0.
+        capacity when the method is called and the load factor is greater or equal to 1.0
+        (or to growth_factor times the capacity at max_load, when those are set).
         """
-        # check if resize is needed
-        if self.table_load() >= 1:
-            self.resize_table(self._capacity * 2)
-
-        # first run the key through the hash function get convert to an int
-        key_value_unmodified = self._hash_function(key)
-
-        # modulo is equal to the size of the DynamicArray
-        modulo_value = self._capacity
-
-        # find the index where the key will be inserted
-        key_insert_index = key_value_unmodified % modulo_value
+        self._upsert(key, value, None)
 
-        # assign variable to track which bucket the value goes into
-        bucket = self._buckets[key_insert_index]
-
-        # verify if the linked list has the key already in it, returns the node if so
-        node_contains = self.contains_key(key)
-
-        # if key is present, update value
-        if node_contains is True:
-
-            # iterate through the existing DynamicArray in the Hash Map
-            for index in range(self._capacity):
-
-                # get the linked list to evaluate
-                current_bucket = self._buckets.get_at_index(key_insert_index)
+    def _upsert(self, key: str, value: object, update, hash_value: int = None) -> object:
+        """
+        Does the resizing work of put(), then inserts or updates the key
+        with one hash and one walk of its bucket (see _put_hashed()).  A
+        hash_value already cached for the key (by a map with the same
+        hash function) is used instead of hashing the key again.
+        """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
 
-                # iterate through the linked list to get all the keys
-                for node in current_bucket:
-                    if node.key == key:
-                        node.value = value
+        # check if resize is needed
+        if self.table_load() >= self._max_load:
+            self._grow()
 
-        # if key is not present, create a new node and update size of linked list
-        else:
-            bucket.insert(key, value)
-            self._size += 1
+        # run the key through the hash function once, the hash is cached in the node
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        return self._put_hashed(key, value, hash_value, update)
 
     def empty_buckets(self) -> int:
         """
         Returns the number of empty buckets in the hash table.
         """
-        # initialize counter
-        count = 0
-
-        # iterate through the DynamicArray
-        for index in range(self._buckets.length()):
-
-            # check if the current index of DynamicArray is empty Linked List
-            current_bucket = self._buckets.get_at_index(index)
-            if current_bucket.length() == 0:
-                count += 1
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
 
-        return count
+        # the empty buckets are the chains of length 0
+        return self._chain_counts[0]
 
     def table_load(self) -> float:
         """
@@ -164,8 +192,12 @@ class HashMap:
     def clear(self) -> None:
         """
         Clears the contents of the hash map without changing the
-        underlying table capacity.
+        underlying table capacity (unless the map has a shrink_load).
         """
+        # when the map shrinks, an empty map goes back to its starting capacity
+        if self._shrink_load is not None:
+            self._capacity = self._min_capacity
+
         # create a new DynamicArray to replace the existing in our Hash Map
         self._buckets = DynamicArray()
 
@@ -173,8 +205,11 @@ class HashMap:
         for index in range(self._capacity):
             self._buckets.append(LinkedList())
 
-        # set our size of our Hash Map back to 0
+        # set our size of our Hash Map back to 0 and drop any incremental resize
         self._size = 0
+        self._chain_counts = [self._capacity]
+        self._new_buckets = None
+        self._old_buckets = None
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -188,17 +223,21 @@ class HashMap:
         if new_capacity < 1:
             return
 
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
         # check if new capacity is prime, if not set to next prime number
         if self._is_prime(new_capacity) is False:
             new_capacity = self._next_prime(new_capacity)
 
         # need to check if load factor is valid
-        while (self._size/new_capacity) > 1:
+        while (self._size/new_capacity) > self._max_load:
             new_capacity = new_capacity * 2
             new_capacity = self._next_prime(new_capacity)
 
-        # reset size to 0 to be updated below when each bucket is filled
+        # reset size and chain lengths to be updated below when each bucket is filled
         self._size = 0
+        self._chain_counts = [new_capacity]
 
         # create a storage DynamicArray to store the resized Hash Map
         storage_da = DynamicArray()
@@ -216,16 +255,19 @@ class HashMap:
             # iterate through the Linked List
             for node in current_bucket:
 
-                # get the existing key and value from the old node
+                # get the existing key, value and cached hash from the old node
                 key = node.key
                 value = node.value
+                hash_value = node.hash
 
-                # hash the key into the new DynamicArray
-                new_key = self._hash_function(key) % new_capacity
+                # reuse the cached hash to find the bucket in the new DynamicArray,
+                # so the hash function is never run again during a resize
+                new_key = hash_value % new_capacity
                 bucket = storage_da[new_key]
 
                 # insert the new node into the new DynamicArray and update size
-                bucket.insert(key, value)
+                self._chain_grew(bucket.length())
+                bucket.insert(key, value, hash_value)
                 self._size += 1
 
         # reassign the Hash Map to use the new DynamicArray
@@ -239,86 +281,79 @@ class HashMap:
         Returns the value associated with the given key.  If the key is not in the
         hash map, return None.
         """
-        # first get the key value
-        key_value_unmodified = self._hash_function(key)
-
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
-
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
-
-        # iterate through the existing DynamicArray in the Hash Map
-        for index in range(self._capacity):
-
-            # get the linked list to evaluate
-            current_bucket = self._buckets.get_at_index(insert_location)
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
 
-            # iterate through the linked list to get all the keys
-            for node in current_bucket:
-                # if key found, return value
-                if node.key == key:
-                    return node.value
+        # hash the key and search its bucket
+        node = self._find_node(key, self._hash_function(key))
 
         # key not found, return None
-        return None
+        if node is None:
+            return None
+
+        return node.value
 
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hash map, otherwise returns False.
         An empty hash map does not contain keys and should return False.
         """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
+
         # edge case when there is an empty hash map, return False
         if self._size == 0:
             return False
 
-        # first get the key value
-        key_value_unmodified = self._hash_function(key)
-
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
-
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
-
-        # iterate through the existing DynamicArray in the Hash Map
-        for index in range(self._capacity):
-
-            # get the linked list to evaluate
-            current_bucket = self._buckets.get_at_index(insert_location)
-
-            # iterate through the linked list to get all the keys
-            for node in current_bucket:
-                # if key found, return True
-                if node.key == key:
-                    return True
-
-        # key not found, return False
-        return False
+        # hash the key and search its bucket
+        return self._find_node(key, self._hash_function(key)) is not None
 
     def remove(self, key: str) -> None:
         """
         Removes the given key and associated value from the hash map.  If
         the key is not in the hash map, the method does nothing.
         """
-        # first get the key value
-        key_value_unmodified = self._hash_function(key)
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
+
+        # hash the key and remove it from its bucket
+        self._remove_hashed(key, self._hash_function(key))
+        self._shrink_if_sparse()
 
-        # modulo is equal to the capacity of the hash table
-        modulo_value = self._capacity
+    def pop(self, key: str, default: object = None) -> object:
+        """
+        Removes the given key from the hash map and returns its value, with
+        one hash and one walk of its bucket.  If the key is not in the hash
+        map, the default value is returned.
+        """
+        # move part of the table if an incremental resize is in progress
+        self._migrate_step()
 
-        # find the index of the insert location
-        insert_location = key_value_unmodified % modulo_value
+        value = self._remove_hashed(key, self._hash_function(key), default)
+        self._shrink_if_sparse()
+        return value
 
-        # go to the correct linked list location
-        bucket = self._buckets[insert_location]
+    def increment(self, key: str, delta: int = 1) -> int:
+        """
+        Adds delta to the value of the given key, which is inserted with a
+        value of delta if it is not in the hash map, and returns the new value.
+        """
+        return self._upsert(key, 0, lambda count: count + delta)
 
-        # remove the node, .remove returns false if node wasn't found
-        remove = bucket.remove(key)
+    def setdefault(self, key: str, default: object = None) -> object:
+        """
+        Returns the value of the given key.  If the key is not in the hash
+        map, it is inserted with the default value, which is returned.
+        """
+        return self._upsert(key, default, lambda value: value)
 
-        # if True, there was a node found and removed, decrement size
-        if remove is True:
-            self._size -= 1
+    def upsert(self, key: str, function: callable, default: object = None) -> object:
+        """
+        Sets the value of the given key to function(value), or to
+        function(default) if the key is not in the hash map, and returns
+        the new value.  If function raises, the hash map is unchanged.
+        """
+        return self._upsert(key, default, function)
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -326,6 +361,9 @@ class HashMap:
         (key, value) pair stored in the hash map.  The order does not
         matter.
         """
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
         # make a new DynamicArray to store all the (key, value) pairs
         key_value_pair = DynamicArray()
 
@@ -343,6 +381,349 @@ class HashMap:
 
         return key_value_pair
 
+    def put_many(self, pairs) -> None:
+        """
+        Updates the hash map with every (key, value) pair in the given
+        iterable (or DynamicArray).  The table is resized at most once,
+        up front, so that the load factor stays at or below max_load for
+        the whole batch, and each pair is then inserted without further checks.
+        """
+        pairs = batch_to_list(pairs)
+
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
+        # pre-size for the worst case where every key in the batch is new
+        if self._size + len(pairs) > self._capacity * self._max_load:
+            self.resize_table(math.ceil((self._size + len(pairs)) / self._max_load))
+
+        # hash the whole batch in one (vectorized, when possible) pass
+        hashes = hash_keys(self._hash_function, [key for key, value in pairs])
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._put_hashed(key, value, hash_value)
+
+    def get_many(self, keys, default: object = None) -> DynamicArray:
+        """
+        Returns a DynamicArray holding the value of every key in the given
+        iterable (or DynamicArray), in input order.  Keys that are not in
+        the hash map get the default value.
+        """
+        keys = batch_to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            node = self._find_node(key, hash_value)
+            values.append(default if node is None else node.value)
+
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in the given iterable (or DynamicArray) from the
+        hash map.  Keys that are not in the hash map are ignored.  The
+        table shrinks at most once, after the whole batch is removed.
+        """
+        keys = batch_to_list(keys)
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            self._remove_hashed(key, hash_value)
+
+        self._shrink_if_sparse()
+
+    def _put_hashed(self, key: str, value: object, hash_value: int, update=None) -> object:
+        """
+        Inserts or updates a key whose full hash is already known, walking
+        its bucket only once and without checking the load factor, and
+        returns the value stored.  Without update, the key's value is set
+        to value.  With update, it is set to update(current value), or to
+        update(value) if the key is not in the hash map yet.
+        """
+        # look the bucket up once, and walk its chain once: if key is
+        # present, update value, otherwise insert a new node at its front
+        bucket = self._buckets[hash_value % self._capacity]
+        node = bucket.contains(key, hash_value)
+        if node is None and self._old_buckets is not None:
+            node = self._find_old_node(key, hash_value)
+
+        if node is not None:
+            node.value = value if update is None else update(node.value)
+            return node.value
+
+        if update is not None:
+            value = update(value)
+        self._chain_grew(bucket.length())
+        bucket.insert(key, value, hash_value)
+        self._size += 1
+        return value
+
+    def _find_node(self, key: str, hash_value: int) -> SLNode:
+        """
+        Returns the node for a key whose full hash is already known,
+        or None if the key is not in the hash map.
+        """
+        node = self._buckets[hash_value % self._capacity].contains(key, hash_value)
+
+        # during an incremental resize, the key may still be in the old table
+        if node is None and self._old_buckets is not None:
+            node = self._find_old_node(key, hash_value)
+
+        return node
+
+    def _find_old_node(self, key: str, hash_value: int) -> SLNode:
+        """
+        Returns the node for a key that has not been moved out of the old
+        table of an incremental resize yet, or None if it is not there.
+        """
+        index = hash_value % self._old_capacity
+        if index < self._old_buckets.length():
+            return self._old_buckets[index].contains(key, hash_value)
+
+        return None
+
+    def _remove_hashed(self, key: str, hash_value: int, default: object = None) -> object:
+        """
+        Removes a key whose full hash is already known, if it is in the hash
+        map, and returns its value, or default if it was not there.
+        """
+        # remove the node, .pop returns None if node wasn't found
+        bucket = self._buckets[hash_value % self._capacity]
+        removed = bucket.pop(key, hash_value)
+        if removed is not None:
+            self._chain_shrank(bucket.length() + 1)
+
+        # during an incremental resize, the key may still be in the old table
+        if removed is None and self._old_buckets is not None:
+            index = hash_value % self._old_capacity
+            if index < self._old_buckets.length():
+                removed = self._old_buckets[index].pop(key, hash_value)
+
+        # there was a node found and removed, decrement size
+        if removed is None:
+            return default
+
+        self._size -= 1
+        return removed.value
+
+    def _grow(self) -> None:
+        """
+        Multiplies the capacity of the hash table by growth_factor.
+        """
+        self._resize_to(max(self._capacity + 1, int(self._capacity * self._growth_factor)))
+
+    def _resize_to(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table, all at once or,
+        in incremental mode, by starting an incremental resize.
+        """
+        if self._incremental is False:
+            self.resize_table(new_capacity)
+
+        # only one incremental resize can be in progress at a time
+        elif self._new_buckets is None and self._old_buckets is None:
+            self._new_buckets = DynamicArray()
+            self._new_capacity = self._next_prime(new_capacity)
+            self._migrate_step()
+
+    def _shrink_if_sparse(self) -> None:
+        """
+        Shrinks the hash table when the load factor has fallen below
+        shrink_load, to the capacity that puts the load factor halfway
+        between shrink_load and max_load.  The gap between the two
+        thresholds keeps the table from resizing back and forth.
+        Nothing shrinks while an incremental resize is in progress.
+        """
+        if self._shrink_load is None or self._capacity <= self._min_capacity:
+            return
+
+        if self._new_buckets is not None or self._old_buckets is not None:
+            return
+
+        if self.table_load() < self._shrink_load:
+            new_capacity = max(self._min_capacity, self._fit_capacity((self._shrink_load + self._max_load) / 2))
+            if self._next_prime(new_capacity) < self._capacity:
+                self._resize_to(new_capacity)
+
+    def _fit_capacity(self, load: float) -> int:
+        """
+        Returns the smallest capacity that holds the current
+        keys with a load factor below the given one.
+        """
+        return int(self._size / load) + 1
+
+    def shrink_to_fit(self) -> None:
+        """
+        Resizes the hash table, all at once, to the smallest prime capacity
+        that holds the current keys below max_load.  This can go below the
+        starting capacity, and the next put() of a new key may grow it again.
+        """
+        self.resize_table(self._fit_capacity(self._max_load))
+
+    def _migrate_step(self) -> None:
+        """
+        Does a bounded amount of the work of an incremental resize: first the
+        new table is allocated a few buckets at a time, then the nodes of the
+        old table are moved into it migration_step buckets at a time.
+        """
+        # allocate part of the new table, once it is complete it becomes the
+        # main table and the current one becomes the old table
+        if self._new_buckets is not None:
+            missing = self._new_capacity - self._new_buckets.length()
+            for _ in range(min(missing, 4 * self._migration_step)):
+                self._new_buckets.append(LinkedList())
+
+            if self._new_buckets.length() == self._new_capacity:
+                self._old_buckets, self._old_capacity = self._buckets, self._capacity
+                self._buckets, self._capacity = self._new_buckets, self._new_capacity
+                self._new_buckets = None
+                self._chain_counts = [self._capacity]
+
+        # move the nodes of the last few buckets of the old table, reusing the
+        # cached hashes, and shrink the old table as its buckets are emptied
+        elif self._old_buckets is not None:
+            for _ in range(min(self._old_buckets.length(), self._migration_step)):
+                for node in self._old_buckets.pop():
+                    bucket = self._buckets[node.hash % self._capacity]
+                    self._chain_grew(bucket.length())
+                    bucket.insert(node.key, node.value, node.hash)
+
+            if self._old_buckets.length() == 0:
+                self._old_buckets = None
+
+    def _finish_resize(self) -> None:
+        """
+        Completes any incremental resize in progress.
+        """
+        while self._new_buckets is not None or self._old_buckets is not None:
+            self._migrate_step()
+
+    def _chain_grew(self, length: int) -> None:
+        """
+        Updates the chain length histogram for a chain of the
+        given length that is about to get one more node.
+        """
+        counts = self._chain_counts
+        counts[length] -= 1
+        if length + 1 == len(counts):
+            counts.append(0)
+        counts[length + 1] += 1
+
+    def _chain_shrank(self, length: int) -> None:
+        """
+        Updates the chain length histogram for a chain of the given
+        length that just lost a node, trimming the histogram so its
+        last length is always the longest chain.
+        """
+        counts = self._chain_counts
+        counts[length] -= 1
+        counts[length - 1] += 1
+        while len(counts) > 1 and counts[-1] == 0:
+            counts.pop()
+
+    def stats(self) -> dict:
+        """
+        Returns a dict of statistics about the shape of the hash table,
+        read from counts that are kept up to date on every insert and
+        remove, so it does not scan the table:
+
+        chain_lengths     list where index i is the number of buckets whose chain has i nodes
+        max_chain         length of the longest chain
+        avg_hit_cost      average number of nodes compared by a get() of a stored key
+        avg_miss_cost     average number of nodes compared by a get() of a missing key
+
+        During an incremental resize the histogram describes the new table,
+        and pending is the number of nodes still waiting in the old one.
+        """
+        counts = self._chain_counts
+
+        # a stored key at position i (from 1) of its chain takes i compares, so a
+        # chain of n nodes takes n * (n + 1) / 2 compares to find each key once
+        stored = sum(length * count for length, count in enumerate(counts))
+        hit_cost = sum(length * (length + 1) // 2 * count for length, count in enumerate(counts))
+
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'load_factor': self.table_load(),
+            'empty_buckets': counts[0],
+            'chain_lengths': list(counts),
+            'max_chain': len(counts) - 1,
+            'avg_hit_cost': hit_cost / stored if stored > 0 else 0.0,
+            'avg_miss_cost': stored / self._capacity,
+            'pending': self._size - stored,
+        }
+
+    def __reduce_ex__(self, protocol: int):
+        """
+        Pickles the hash map as its flat layout: the chain length of every
+        bucket, then the cached hash, key and value of every node in bucket
+        and chain order.  With protocol 5 the lengths and hashes are
+        out-of-band buffers.  Unpickling rebuilds the same chains in the
+        same buckets without running the hash function.
+        """
+        # finish any incremental resize first, so there is only one table
+        self._finish_resize()
+
+        lengths, hashes, keys, values = array('Q'), [], [], []
+        for index in range(self._capacity):
+            bucket = self._buckets[index]
+            lengths.append(bucket.length())
+            for node in bucket:
+                hashes.append(node.hash)
+                keys.append(node.key)
+                values.append(node.value)
+
+        options = {'incremental': self._incremental, 'migration_step': self._migration_step,
+                   'max_load': self._max_load, 'growth_factor': self._growth_factor,
+                   'shrink_load': self._shrink_load}
+        return _restore, (self._capacity, self._min_capacity, self._hash_function, options,
+                          flat_buffer(lengths, protocol), flat_buffer(flat_hashes(hashes), protocol),
+                          keys, values)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the hash map to a file, as its flat layout (see __reduce_ex__)
+        with the lengths and hashes written raw after the pickle stream.
+        """
+        save_pickle(self, path)
+
+    @staticmethod
+    def load(path: str) -> "HashMap":
+        """
+        Reads a hash map written by save(), with the same capacity and every
+        node in the same bucket and chain position.  Like pickle itself, this
+        must only be used on trusted files.
+        """
+        m = load_pickle(path)
+        if not isinstance(m, HashMap):
+            raise ValueError(f"{path} does not hold a separate chaining HashMap")
+
+        return m
+
+
+def _restore(capacity: int, min_capacity: int, function, options: dict,
+             lengths, hashes, keys: list, values: list) -> HashMap:
+    """
+    Rebuilds a HashMap pickled by HashMap.__reduce_ex__().
+    """
+    m = HashMap(capacity, function, **options)
+    m._min_capacity = min_capacity
+    lengths = unflat_array('Q', lengths)
+    hashes = unflat_array('Q', hashes)
+
+    # nodes are inserted at the front of a chain, so each chain is built from its tail
+    position = 0
+    for index, length in enumerate(lengths):
+        bucket = m._buckets[index]
+        for node in range(position + length - 1, position - 1, -1):
+            bucket.insert(keys[node], values[node], hashes[node])
+        position += length
+
+    # the chain length histogram, trimmed so its last length is the longest chain
+    counts = [0] * (max(lengths, default=0) + 1)
+    for length in lengths:
+        counts[length] += 1
+    m._chain_counts = counts
+    m._size = position
+    return m
+
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
@@ -356,31 +737,14 @@ def find_mode(da: DynamicArray) -> (DynamicArray, int):
     # use this instance of your Separate Chaining HashMap
     map = HashMap()
 
-    # iterate through the DynamicArray that is passed in, adding it to the hash map
-    for index in range(da.length()):
-
-        # if the key already exists, increment the counter(value) for the key, then update the key
-        if map.contains_key(da[index]):
-            value = map.get(da[index])
-            value += 1
-            map.put(da[index], value)
-
-        # if the key doesn't exist, insert the key with counter(value) of 1
-        else:
-            map.put(da[index], 1)
-
-    # set mode to index 0 of DynamicArray, since we know the DA has at least 1 value
+    # count every value of the DynamicArray in one pass, each value is
+    # hashed once and its count is incremented in place (or inserted as 1),
+    # keeping track of the highest count as we go
     count = 0
-
-    # iterate through the DynamicArray, tracking what associated bucket has the highest value
-    for bucket in range(da.length()):
-        key = da.get_at_index(bucket)
-
-        # check if the value of a particular key is greater than count
-        if map.get(key) > count:
-
-            # when a new highest value is found, update count
-            count = map.get(key)
+    for index in range(da.length()):
+        frequency = map.increment(da[index])
+        if frequency > count:
+            count = frequency
 
     # create an array to store all the final
     result = DynamicArray()
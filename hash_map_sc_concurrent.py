@@ -0,0 +1,345 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Separate chaining Hash Map that can be shared between threads.
+# The buckets are guarded by a fixed array of lock stripes, bucket i by lock
+# i % stripes, so put(), get(), contains_key() and remove() calls on buckets of
+# different stripes do not block each other.  Anything that touches the whole
+# table (resizing, clear(), empty_buckets(), get_keys_and_values()) takes every
+# stripe, always in the same order.  No call relies on the GIL to be atomic, so
+# the map is also safe on free-threaded CPython builds.
+
+import threading
+from contextlib import contextmanager
+
+from a6_include import DynamicArray, LinkedList, hash_function_1, hash_function_2
+
+# Default number of lock stripes
+STRIPES = 16
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = STRIPES) -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution
+        """
+        if stripes < 1:
+            raise ValueError(f"stripes must be at least 1, not {stripes!r}")
+
+        # capacity must be a prime number
+        capacity = self._next_prime(capacity)
+        buckets = DynamicArray()
+        for _ in range(capacity):
+            buckets.append(LinkedList())
+
+        # the buckets and their capacity are replaced together, as one tuple,
+        # so a thread can never see the buckets of one table with the
+        # capacity of another
+        self._table = (buckets, capacity)
+        self._hash_function = function
+
+        # the lock stripes, and the number of keys in the buckets of each
+        # stripe, which is only changed while holding that stripe's lock
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+        self._sizes = [0] * stripes
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        with self._all_locks():
+            buckets, capacity = self._table
+            out = ''
+            for i in range(capacity):
+                out += str(i) + ': ' + str(buckets[i]) + '\n'
+            return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map.  While other threads are writing,
+        this is the size at some point during the call.
+        """
+        return sum(self._sizes)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table[1]
+
+    # ------------------------------------------------------------------ #
+
+    def _acquire(self, hash_value: int) -> tuple:
+        """
+        Locks the stripe of the bucket for the given hash and returns
+        (bucket, stripe).  The caller must release the stripe's lock.
+        If a resize replaced the table while this thread was waiting
+        for the lock, the bucket is looked up again in the new table.
+        """
+        while True:
+            table = self._table
+            index = hash_value % table[1]
+            stripe = index % len(self._locks)
+            self._locks[stripe].acquire()
+
+            if self._table is table:
+                return table[0][index], stripe
+
+            self._locks[stripe].release()
+
+    @contextmanager
+    def _all_locks(self):
+        """
+        Holds every stripe for the body of a with statement.  The stripes
+        are always taken in the same order, so two threads doing this can
+        never deadlock, and no thread holding one stripe ever asks for
+        another.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Pass in a key:value pair, where the key is a string.  If the existing key already exists,
+        update the associated value with the new value.  If the key doesn't exist, add the new
+        key:value pair into the hash table.  The table is resized to double the current
+        capacity once the load factor is greater or equal to 1.0.
+        """
+        # hash the key before taking the lock, the hash is cached in the node
+        hash_value = self._hash_function(key)
+        bucket, stripe = self._acquire(hash_value)
+        try:
+            # if key is present, update value, otherwise insert a new node
+            node = bucket.contains(key, hash_value)
+            if node is not None:
+                node.value = value
+                return
+
+            bucket.insert(key, value, hash_value)
+            self._sizes[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        # the resize takes every stripe, so it waits until this one is released
+        if self.table_load() >= 1:
+            self._grow()
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the given key.  If the key is not in the
+        hash map, return None.
+        """
+        hash_value = self._hash_function(key)
+        bucket, stripe = self._acquire(hash_value)
+        try:
+            node = bucket.contains(key, hash_value)
+        finally:
+            self._locks[stripe].release()
+
+        if node is None:
+            return None
+
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise returns False.
+        An empty hash map does not contain keys and should return False.
+        """
+        hash_value = self._hash_function(key)
+        bucket, stripe = self._acquire(hash_value)
+        try:
+            return bucket.contains(key, hash_value) is not None
+        finally:
+            self._locks[stripe].release()
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and associated value from the hash map.  If
+        the key is not in the hash map, the method does nothing.
+        """
+        hash_value = self._hash_function(key)
+        bucket, stripe = self._acquire(hash_value)
+        try:
+            if bucket.remove(key, hash_value) is True:
+                self._sizes[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        with self._all_locks():
+            buckets, capacity = self._table
+            return sum(1 for index in range(capacity) if buckets[index].length() == 0)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return float(self.get_size() / self._table[1])
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the
+        underlying table capacity.
+        """
+        with self._all_locks():
+            capacity = self._table[1]
+            buckets = DynamicArray()
+            for _ in range(capacity):
+                buckets.append(LinkedList())
+
+            for stripe in range(len(self._sizes)):
+                self._sizes[stripe] = 0
+            self._table = (buckets, capacity)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table.  All existing key:value pairs must
+        remain in the new hash map, and all hash table links must be rehashed.  If
+        the new_capacity is less than 1, do nothing.  If the new_capacity is 1 or
+        greater, verify it is a prime number.  If not, change it to the next prime
+        number using _is_prime() and _next_prime() methods.
+        """
+        # verify new capacity is >= 1
+        if new_capacity < 1:
+            return
+
+        with self._all_locks():
+            self._rehash(new_capacity)
+
+    def _grow(self) -> None:
+        """
+        Doubles the capacity of the hash table, unless another
+        thread already grew it while this one waited for the locks.
+        """
+        with self._all_locks():
+            if self.table_load() >= 1:
+                self._rehash(self._table[1] * 2)
+
+    def _rehash(self, new_capacity: int) -> None:
+        """
+        Moves every node into a new table of the given capacity, reusing
+        the cached hashes.  The caller must hold every stripe.
+        """
+        buckets, capacity = self._table
+
+        # check if new capacity is prime, if not set to next prime number
+        if self._is_prime(new_capacity) is False:
+            new_capacity = self._next_prime(new_capacity)
+
+        # need to check if load factor is valid
+        while (self.get_size() / new_capacity) > 1:
+            new_capacity = new_capacity * 2
+            new_capacity = self._next_prime(new_capacity)
+
+        storage_da = DynamicArray()
+        for _ in range(new_capacity):
+            storage_da.append(LinkedList())
+
+        # the stripe of a key depends on its bucket, so the sizes are recounted
+        sizes = [0] * len(self._locks)
+        for index in range(capacity):
+            for node in buckets[index]:
+                new_index = node.hash % new_capacity
+                storage_da[new_index].insert(node.key, node.value, node.hash)
+                sizes[new_index % len(self._locks)] += 1
+
+        for stripe, size in enumerate(sizes):
+            self._sizes[stripe] = size
+        self._table = (storage_da, new_capacity)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each index contains a tuple of a
+        (key, value) pair stored in the hash map.  The order does not
+        matter.
+        """
+        key_value_pair = DynamicArray()
+        with self._all_locks():
+            buckets, capacity = self._table
+            for index in range(capacity):
+                for node in buckets[index]:
+                    key_value_pair.append((node.key, node.value))
+
+        return key_value_pair
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - resize example 2a")
+    print("----------------------")
+    m = HashMap(82, hash_function_2)
+    for key in ("key25", "key72", "key4", "key502", "key520", "key620",
+                "key173", "key471", "key357", "key396", "key669", "key978"):
+        m.put(key, key)
+    print(m.get_size(), m.get_capacity())
+
+    m.resize_table(9)
+    print("size: ", m.get_size(), "capacity: ", m.get_capacity())
+    print("Expected result is: size: 12, capacity: 23")
+
+    print("\nThreads - put, get and remove from 4 threads")
+    print("------------------------")
+    m = HashMap(11, hash_function_1, stripes=4)
+
+    def worker(thread: int) -> None:
+        keys = ['t' + str(thread) + 'k' + str(i) for i in range(1000)]
+        for key in keys:
+            m.put(key, thread)
+        for key in keys[::2]:
+            m.remove(key)
+
+    threads = [threading.Thread(target=worker, args=(thread,)) for thread in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(m.get_size(), m.get_keys_and_values().length())
+    print("Expected result is: 2000 2000")
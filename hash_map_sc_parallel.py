@@ -0,0 +1,144 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Parallel version of hash_map_sc.find_mode() for large inputs.
+# The input is read in chunks, each chunk is counted into a separate chaining
+# HashMap by a worker process (map), and the partial counts are added into one
+# HashMap as the workers finish them (combine) before the modes are picked out
+# of it (reduce).  The partial maps come back from the workers through pickle,
+# which sends them as their flat layout of cached hashes, keys and values.
+
+import itertools
+import multiprocessing
+import os
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+# Default number of values counted by a worker at a time
+CHUNK_SIZE = 100_000
+
+
+def count_chunk(chunk: list, function: callable = hash_function_1) -> hash_map_sc.HashMap:
+    """
+    Returns a separate chaining HashMap of value -> count for the values
+    of the given chunk.  This is the map step, run by each worker.
+    """
+    counts = hash_map_sc.HashMap(11, function)
+    for value in chunk:
+        counts.increment(value)
+
+    return counts
+
+
+def combine_counts(total: hash_map_sc.HashMap, partial: hash_map_sc.HashMap) -> None:
+    """
+    Adds every count of a partial map to the total map.  When both maps
+    use the same hash function, the hashes cached in the partial map's
+    nodes are reused, so no key is hashed again.
+    """
+    same_function = partial._hash_function == total._hash_function
+    for node in _nodes(partial):
+        total._upsert(node.key, 0, lambda count, delta=node.value: count + delta,
+                      node.hash if same_function else None)
+
+
+def _nodes(counts: hash_map_sc.HashMap):
+    """
+    Yields every node of the given separate chaining HashMap.
+    """
+    counts._finish_resize()
+    for index in range(counts.get_capacity()):
+        for node in counts._buckets[index]:
+            yield node
+
+
+def _chunks(values, chunk_size: int):
+    """
+    Yields lists of up to chunk_size values from the given iterable (or
+    DynamicArray), so the input is never copied whole.
+    """
+    if isinstance(values, DynamicArray):
+        for start in range(0, values.length(), chunk_size):
+            yield [values[index] for index in range(start, min(start + chunk_size, values.length()))]
+        return
+
+    values = iter(values)
+    while True:
+        chunk = list(itertools.islice(values, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def find_mode_parallel(values, workers: int = None, chunk_size: int = CHUNK_SIZE,
+                       function: callable = hash_function_1) -> (DynamicArray, int):
+    """
+    Returns the same (DynamicArray of modes, frequency) tuple as
+    hash_map_sc.find_mode() for any iterable (or DynamicArray), counting
+    chunks of chunk_size values in a pool of worker processes (by default
+    one per CPU).  With one worker the chunks are counted in this process.
+    The hash function must be a module level function, so it can be sent
+    to the workers.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, not {workers!r}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, not {chunk_size!r}")
+
+    total = hash_map_sc.HashMap(11, function)
+    chunks = _chunks(values, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            combine_counts(total, count_chunk(chunk, function))
+    else:
+        # at most two chunks per worker are read ahead of the workers, and
+        # each partial map is combined as soon as it is finished
+        with multiprocessing.Pool(workers) as pool:
+            pending = []
+            for chunk in chunks:
+                pending.append(pool.apply_async(count_chunk, (chunk, function)))
+                if len(pending) >= 2 * workers:
+                    combine_counts(total, pending.pop(0).get())
+            for partial in pending:
+                combine_counts(total, partial.get())
+
+    # reduce the combined counts to the modes
+    modes = DynamicArray()
+    frequency = 0
+    for node in _nodes(total):
+        if node.value > frequency:
+            frequency = node.value
+            modes = DynamicArray()
+        if node.value == frequency:
+            modes.append(node.key)
+
+    return modes, frequency
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - find_mode example 1, with 2 workers")
+    print("-----------------------------")
+    da = DynamicArray(["apple", "apple", "grape", "melon", "peach"])
+    mode, frequency = find_mode_parallel(da, workers=2, chunk_size=2)
+    print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}")
+
+    print("\nPDF - find_mode example 2, with 2 workers")
+    print("-----------------------------")
+    test_cases = (
+        ["Arch", "Manjaro", "Manjaro", "Mint", "Mint", "Mint", "Ubuntu", "Ubuntu", "Ubuntu"],
+        ["one", "two", "three", "four", "five"],
+        ["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"]
+    )
+    for case in test_cases:
+        da = DynamicArray(case)
+        mode, frequency = find_mode_parallel(da, workers=2, chunk_size=3, function=hash_function_2)
+        print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
@@ -0,0 +1,377 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Separate chaining Hash Map with the same methods as hash_map_sc.HashMap,
+# stored in a single pool of entries instead of one LinkedList per bucket and one
+# SLNode per entry.  The pool is a set of parallel flat arrays (hash, key, value,
+# next index), the buckets are an array('l') of chain heads, and freed pool slots
+# are kept on a free list for reuse.
+
+from array import array
+
+from a6_include import (DynamicArray, batch_to_list,
+                        hash_function_1, hash_function_2, hash_keys)
+
+# Index used for the end of a chain, an empty bucket, and an empty free list
+NIL = -1
+
+# Hashes are stored as unsigned 64 bit integers, so every hash is reduced to
+# 64 bits first and that reduced hash is used for both storage and indexing
+HASH_MASK = (1 << 64) - 1
+
+
+class HashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1) -> None:
+        """
+        Initialize new HashMap that uses
+        separate chaining for collision resolution
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._heads = array('l', [NIL]) * self._capacity
+
+        # the entry pool, entry i is (hashes[i], keys[i], values[i]) and the
+        # next entry of its chain (or of the free list) is nexts[i]
+        self._hashes = array('Q')
+        self._keys = []
+        self._values = []
+        self._nexts = array('l')
+        self._free = NIL
+
+        self._hash_function = function
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            content = ' -> '.join('(' + str(self._keys[entry]) + ': ' + str(self._values[entry]) + ')'
+                                  for entry in self._chain(i))
+            out += str(i) + ': SLL [' + content + ']\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number and the find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _chain(self, bucket: int):
+        """
+        Yields the pool index of every entry in the given bucket's chain.
+        """
+        entry = self._heads[bucket]
+        while entry != NIL:
+            yield entry
+            entry = self._nexts[entry]
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Pass in a key:value pair, where the key is a string.  If the existing key already exists,
+        update the associated value with the new value.  If the key doesn't exist, add the new
+        key:value pair into the hash table.  The table must be resized to double the current
+        capacity when the method is called and the load factor is greater or equal to 1.0.
+        """
+        # check if resize is needed
+        if self.table_load() >= 1:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, self._hash_function(key) & HASH_MASK)
+
+    def _put_hashed(self, key: str, value: object, hash_value: int) -> None:
+        """
+        Inserts or updates a key whose reduced hash is already known, walking
+        its chain only once and without checking the load factor.
+        """
+        bucket = hash_value % self._capacity
+
+        # if key is present, update value
+        entry = self._find_in_chain(bucket, key, hash_value)
+        if entry != NIL:
+            self._values[entry] = value
+            return
+
+        # otherwise take a slot from the free list, or grow the pool by one
+        entry = self._free
+        if entry != NIL:
+            self._free = self._nexts[entry]
+            self._hashes[entry] = hash_value
+            self._keys[entry] = key
+            self._values[entry] = value
+        else:
+            entry = len(self._keys)
+            self._hashes.append(hash_value)
+            self._keys.append(key)
+            self._values.append(value)
+            self._nexts.append(NIL)
+
+        # link the new entry in at the front of its chain
+        self._nexts[entry] = self._heads[bucket]
+        self._heads[bucket] = entry
+        self._size += 1
+
+    def _find_in_chain(self, bucket: int, key: str, hash_value: int) -> int:
+        """
+        Returns the pool index of the entry for a key whose reduced hash is
+        already known in the given bucket's chain, or NIL if it is not there.
+        """
+        hashes, keys, nexts = self._hashes, self._keys, self._nexts
+        entry = self._heads[bucket]
+
+        # cached hashes are compared before the keys themselves
+        while entry != NIL:
+            if hashes[entry] == hash_value and keys[entry] == key:
+                return entry
+            entry = nexts[entry]
+
+        return NIL
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets in the hash table.
+        """
+        return self._heads.count(NIL)
+
+    def table_load(self) -> float:
+        """
+        Returns the current hash table load factor.
+        """
+        return float(self._size / self._capacity)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the
+        underlying table capacity.
+        """
+        self._heads = array('l', [NIL]) * self._capacity
+        self._hashes = array('Q')
+        self._keys = []
+        self._values = []
+        self._nexts = array('l')
+        self._free = NIL
+        self._size = 0
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Changes the capacity of the hash table.  All existing key:value pairs must
+        remain in the new hash map, and all hash table links must be rehashed.  If
+        the new_capacity is less than 1, do nothing.  If the new_capacity is 1 or
+        greater, verify it is a prime number.  If not, change it to the next prime
+        number using _is_prime() and _next_prime() methods.
+
+        Entries stay where they are in the pool, only the chains are re-linked.
+        """
+        # verify new capacity is >= 1
+        if new_capacity < 1:
+            return
+
+        # check if new capacity is prime, if not set to next prime number
+        if self._is_prime(new_capacity) is False:
+            new_capacity = self._next_prime(new_capacity)
+
+        # need to check if load factor is valid
+        while (self._size / new_capacity) > 1:
+            new_capacity = new_capacity * 2
+            new_capacity = self._next_prime(new_capacity)
+
+        # re-link every entry at the front of its new chain, using its cached hash
+        old_heads = self._heads
+        heads = array('l', [NIL]) * new_capacity
+        hashes, nexts = self._hashes, self._nexts
+        for bucket in range(self._capacity):
+            entry = old_heads[bucket]
+            while entry != NIL:
+                following = nexts[entry]
+                new_bucket = hashes[entry] % new_capacity
+                nexts[entry] = heads[new_bucket]
+                heads[new_bucket] = entry
+                entry = following
+
+        self._heads = heads
+        self._capacity = new_capacity
+
+    def get(self, key: str):
+        """
+        Returns the value associated with the given key.  If the key is not in the
+        hash map, return None.
+        """
+        hash_value = self._hash_function(key) & HASH_MASK
+        entry = self._find_in_chain(hash_value % self._capacity, key, hash_value)
+        if entry == NIL:
+            return None
+
+        return self._values[entry]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hash map, otherwise returns False.
+        An empty hash map does not contain keys and should return False.
+        """
+        if self._size == 0:
+            return False
+
+        hash_value = self._hash_function(key) & HASH_MASK
+        return self._find_in_chain(hash_value % self._capacity, key, hash_value) != NIL
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and associated value from the hash map.  If
+        the key is not in the hash map, the method does nothing.
+        """
+        self._remove_hashed(key, self._hash_function(key) & HASH_MASK)
+
+    def _remove_hashed(self, key: str, hash_value: int) -> None:
+        """
+        Removes a key whose reduced hash is already known, if it is in the
+        hash map, and puts its pool slot on the free list.
+        """
+        hashes, keys, nexts = self._hashes, self._keys, self._nexts
+        bucket = hash_value % self._capacity
+        previous, entry = NIL, self._heads[bucket]
+        while entry != NIL:
+
+            if hashes[entry] == hash_value and keys[entry] == key:
+                # unlink the entry from its chain
+                if previous != NIL:
+                    nexts[previous] = nexts[entry]
+                else:
+                    self._heads[bucket] = nexts[entry]
+
+                # drop the references so the key and value can be freed
+                keys[entry] = None
+                self._values[entry] = None
+                nexts[entry] = self._free
+                self._free = entry
+                self._size -= 1
+                return
+
+            previous, entry = entry, nexts[entry]
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Returns a DynamicArray where each index contains a tuple of a
+        (key, value) pair stored in the hash map.  The order does not
+        matter.
+        """
+        key_value_pair = DynamicArray()
+        for bucket in range(self._capacity):
+            for entry in self._chain(bucket):
+                key_value_pair.append((self._keys[entry], self._values[entry]))
+
+        return key_value_pair
+
+    def put_many(self, pairs) -> None:
+        """
+        Updates the hash map with every (key, value) pair in the given
+        iterable (or DynamicArray).  The table is resized at most once,
+        up front, so that the load factor stays at or below 1.0 for the
+        whole batch, and each pair is then inserted without further checks.
+        """
+        pairs = batch_to_list(pairs)
+
+        # pre-size for the worst case where every key in the batch is new
+        if self._size + len(pairs) > self._capacity:
+            self.resize_table(self._size + len(pairs))
+
+        # hash the whole batch in one (vectorized, when possible) pass
+        hashes = hash_keys(self._hash_function, [key for key, value in pairs])
+        for (key, value), hash_value in zip(pairs, hashes):
+            self._put_hashed(key, value, hash_value & HASH_MASK)
+
+    def get_many(self, keys, default: object = None) -> DynamicArray:
+        """
+        Returns a DynamicArray holding the value of every key in the given
+        iterable (or DynamicArray), in input order.  Keys that are not in
+        the hash map get the default value.
+        """
+        keys = batch_to_list(keys)
+        values = DynamicArray()
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            hash_value &= HASH_MASK
+            entry = self._find_in_chain(hash_value % self._capacity, key, hash_value)
+            values.append(default if entry == NIL else self._values[entry])
+
+        return values
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in the given iterable (or DynamicArray) from the
+        hash map.  Keys that are not in the hash map are ignored.
+        """
+        keys = batch_to_list(keys)
+        for key, hash_value in zip(keys, hash_keys(self._hash_function, keys)):
+            self._remove_hashed(key, hash_value & HASH_MASK)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - resize example 2a")
+    print("----------------------")
+    m = HashMap(82, hash_function_2)
+    for key in ("key25", "key72", "key4", "key502", "key520", "key620",
+                "key173", "key471", "key357", "key396", "key669", "key978"):
+        m.put(key, key)
+    print(m.get_size(), m.get_capacity())
+
+    m.resize_table(9)
+    print("size: ", m.get_size(), "capacity: ", m.get_capacity())
+    print("Expected result is: size: 12, capacity: 23")
+
+    print("\nPDF - get_keys_and_values example 1")
+    print("------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    print(m.get_keys_and_values())
+
+    m.put('20', '200')
+    m.remove('1')
+    m.resize_table(2)
+    print(m.get_keys_and_values())
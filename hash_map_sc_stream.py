@@ -0,0 +1,259 @@
+# Name: Kyle Greene
+# OSU Email: greeneky@oregonstate.edu
+# Course: CS261 - Data Structures
+# Assignment: 6 - HashMap Implementation
+# Due Date: 12/2/2022
+# Description: Streaming versions of hash_map_sc.find_mode() for inputs too big
+# to hold in a DynamicArray.  Both counters read any iterable in a single pass,
+# can be given more input with update() at any time, and answer result() (the
+# same (DynamicArray of modes, frequency) tuple as find_mode) or top(k) between
+# updates.  ExactMode keeps a count for every distinct value in a separate
+# chaining HashMap.  SpaceSaving only keeps k counters, so it runs in bounded
+# memory however many distinct values the stream has, and reports how far each
+# of its counts may be over the true count.
+
+import heapq
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+class ExactMode:
+    def __init__(self, function: callable = hash_function_1) -> None:
+        """
+        Initialize an exact streaming mode counter, which
+        counts values in a separate chaining HashMap.
+        """
+        self._counts = hash_map_sc.HashMap(11, function)
+        self._length = 0
+
+        # the highest count so far, and every value that has it, kept up to date
+        # on each update so result() never scans the counts
+        self._frequency = 0
+        self._modes = DynamicArray()
+
+    def length(self) -> int:
+        """
+        Return the number of values counted so far
+        """
+        return self._length
+
+    def update(self, values) -> None:
+        """
+        Counts every value of the given iterable (or DynamicArray), reading
+        it once.  Generators and other iterators are consumed as they go.
+        """
+        if isinstance(values, DynamicArray):
+            values = (values[index] for index in range(values.length()))
+
+        counts = self._counts
+        for value in values:
+            count = counts.increment(value)
+            self._length += 1
+
+            # a value reaches each count once, so it is never added to the modes twice
+            if count > self._frequency:
+                self._frequency = count
+                self._modes = DynamicArray()
+                self._modes.append(value)
+            elif count == self._frequency:
+                self._modes.append(value)
+
+    def result(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a DynamicArray of the mode value(s) counted so far
+        and their frequency, as find_mode() does.  The DynamicArray is a copy,
+        so later updates do not change it.
+        """
+        modes = DynamicArray()
+        for index in range(self._modes.length()):
+            modes.append(self._modes[index])
+
+        return modes, self._frequency
+
+    def top(self, k: int) -> DynamicArray:
+        """
+        Return a DynamicArray of (value, count, error) tuples for the k most
+        frequent values counted so far, most frequent first.  The counts are
+        exact, so every error is 0.
+        """
+        entries = self._counts.get_keys_and_values()
+        pairs = (entries[index] for index in range(entries.length()))
+
+        top = DynamicArray()
+        for value, count in heapq.nlargest(k, pairs, key=lambda pair: pair[1]):
+            top.append((value, count, 0))
+
+        return top
+
+
+class SpaceSaving:
+    def __init__(self, k: int, function: callable = hash_function_1) -> None:
+        """
+        Initialize an approximate streaming mode counter that keeps at most k
+        counters (the Space-Saving algorithm).  A value seen more than n / k
+        times in a stream of n values is always among them.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, not {k!r}")
+
+        self._k = k
+        self._length = 0
+
+        # value -> [count, error] for every monitored value, where count may be
+        # over the true count by at most error
+        self._counters = hash_map_sc.HashMap(11, function)
+
+        # min-heap of (count, value) used to find the counter to replace.  A
+        # counter's old entries are left in the heap when its count goes up
+        # and skipped when they reach the top, and the heap is rebuilt from
+        # the counters once it holds more than 2k entries.
+        self._heap = []
+
+    def length(self) -> int:
+        """
+        Return the number of values counted so far
+        """
+        return self._length
+
+    def _min_counter(self) -> tuple:
+        """
+        Return (count, value) of a monitored value with the lowest count.
+        """
+        heap = self._heap
+        while True:
+            count, value = heap[0]
+            if self._counters.get(value)[0] == count:
+                return count, value
+            heapq.heappop(heap)
+
+    def _rebuild_heap(self) -> None:
+        """
+        Rebuild the heap with one entry per monitored value, dropping old entries.
+        """
+        entries = self._counters.get_keys_and_values()
+        self._heap = [(entries[index][1][0], entries[index][0]) for index in range(entries.length())]
+        heapq.heapify(self._heap)
+
+    def update(self, values) -> None:
+        """
+        Counts every value of the given iterable (or DynamicArray), reading
+        it once.  Generators and other iterators are consumed as they go.
+        """
+        if isinstance(values, DynamicArray):
+            values = (values[index] for index in range(values.length()))
+
+        counters, heap = self._counters, self._heap
+        for value in values:
+            self._length += 1
+            counter = counters.get(value)
+
+            if counter is not None:
+                counter[0] += 1
+            elif counters.get_size() < self._k:
+                counter = [1, 0]
+                counters.put(value, counter)
+            else:
+                # replace the lowest counter, the new value may have been counted
+                # under it before, so its count is over by at most that count
+                count, evicted = self._min_counter()
+                heapq.heappop(heap)
+                counters.remove(evicted)
+                counter = [count + 1, count]
+                counters.put(value, counter)
+
+            heapq.heappush(heap, (counter[0], value))
+            if len(heap) > 2 * self._k:
+                self._rebuild_heap()
+                heap = self._heap
+
+    def error_bound(self) -> int:
+        """
+        Return the most any count reported by top() or result() can be
+        over the true count, which is never more than n / k.
+        """
+        if self._counters.get_size() < self._k:
+            return 0
+
+        return self._min_counter()[0]
+
+    def top(self, k: int = None) -> DynamicArray:
+        """
+        Return a DynamicArray of (value, count, error) tuples for the k (by
+        default all) monitored values with the highest counts, highest first.
+        Each value's true count is between count - error and count, and any
+        value left out was seen at most error_bound() times.
+        """
+        entries = self._counters.get_keys_and_values()
+        counters = (entries[index] for index in range(entries.length()))
+        if k is None:
+            k = self._k
+
+        top = DynamicArray()
+        for value, (count, error) in heapq.nlargest(k, counters, key=lambda pair: pair[1][0]):
+            top.append((value, count, error))
+
+        return top
+
+    def result(self) -> (DynamicArray, int):
+        """
+        Return a tuple of a DynamicArray of the value(s) with the highest
+        count and that count, as find_mode() does.  The count may be over
+        the true frequency by the error top() reports for each value.
+        """
+        modes = DynamicArray()
+        frequency = 0
+        entries = self._counters.get_keys_and_values()
+        for index in range(entries.length()):
+            value, (count, error) = entries[index]
+            if count > frequency:
+                frequency = count
+                modes = DynamicArray()
+            if count == frequency:
+                modes.append(value)
+
+        return modes, frequency
+
+
+def find_mode_stream(values, k: int = None, function: callable = hash_function_1) -> (DynamicArray, int):
+    """
+    Returns the same (DynamicArray of modes, frequency) tuple as
+    hash_map_sc.find_mode() for any iterable, reading it once.  With k,
+    only k counters are kept and the result is approximate (see SpaceSaving).
+    """
+    counter = ExactMode(function) if k is None else SpaceSaving(k, function)
+    counter.update(values)
+    return counter.result()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nPDF - find_mode example 1, from a generator")
+    print("-----------------------------")
+    values = ["apple", "apple", "grape", "melon", "peach"]
+    mode, frequency = find_mode_stream(value for value in values)
+    print(f"Input: {values}\nMode : {mode}, Frequency: {frequency}")
+
+    print("\nExact counts in chunks")
+    print("-----------------------------")
+    counter = ExactMode(hash_function_2)
+    counter.update(["one", "two", "two"])
+    print(counter.result()[1], counter.top(2))
+    counter.update(iter(["one", "one", "three"]))
+    print(counter.result()[1], counter.top(2))
+
+    print("\nSpace-Saving with 10 counters, 10000 values")
+    print("-----------------------------")
+    import random
+    rng = random.Random(0)
+    stream = ['hot' + str(rng.randint(0, 4)) if rng.random() < 0.5 else str(rng.randint(0, 9999))
+              for _ in range(10000)]
+    counter = SpaceSaving(10)
+    counter.update(stream)
+    print("error bound:", counter.error_bound())
+    top = counter.top(5)
+    for index in range(top.length()):
+        value, count, error = top[index]
+        print(value, count, error, stream.count(value))